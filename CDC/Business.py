@@ -1,39 +1,27 @@
+import os
 import pandas as pd
+from bea_dataset import load_bea_table
 
+# Candidate files for each table; the first one present is used
 csv_configs = [
-    {'file': 'Space Economy Compensation by Industry.csv', 'start_row': 6, 'end_row': 101},  
-    {'file': 'Real Gross Output by Industry.csv', 'start_row': 6, 'end_row': 101},  
-    {'file': 'Real Value Added by Industry.csv', 'start_row': 6, 'end_row': 101},  
-    {'file': 'Space Economy Employment by Industry.csv', 'start_row': 6, 'end_row': 101}, 
+    {'files': ['Space Economy Compensation by Industry.csv']},
+    {'files': ['Real Gross Output by Industry.csv', 'Space Economy Real Gross Output by Industry.csv']},
+    {'files': ['Real Value Added by Industry.csv', 'Space Economy Real Value Added by Industry.csv']},
+    {'files': ['Space Economy Employment by Industry.csv']},
 ]
 
+# file_rows_dict holds each table as (labels, years, industry x year array), not lists of rows.
+# load_bea_table takes them from the columnar dataset (bea_dataset.py) while it holds
+# the same version of the CSV, and parses the CSV otherwise
 file_rows_dict = {}
 
 for config in csv_configs:
-    file = config['file']
-    start = config['start_row']
-    end = config['end_row']
-    
-    df = pd.read_csv(file)
-    df = df.iloc[start:end + 1]
-    df = df.iloc[:, 2:14]
-    df = df.apply(pd.to_numeric, errors='coerce')
-    rows_as_2d_arrays = [[row.tolist()] for _, row in df.iterrows()]
-    file_rows_dict[file] = rows_as_2d_arrays
+    file = next((f for f in config['files'] if os.path.exists(f)), config['files'][0])
+    df = load_bea_table(file, drop_empty=False)
+    file_rows_dict[file] = (df.index.tolist(), list(df.columns), df.to_numpy())
 
-first_file = csv_configs[0]['file']
-second_file = csv_configs[1]['file']
-third_file = csv_configs[2]['file']
-fourth_file = csv_configs[3]['file']
-print(f"2D arrays for {first_file}:")
-for arr in file_rows_dict[first_file]:
-    print(arr)
-print(f"\n2D arrays for {second_file}:")
-for arr in file_rows_dict[second_file]:
-    print(arr)
-print(f"\n2D arrays for {third_file}:")
-for arr in file_rows_dict[third_file]:
-    print(arr)
-print(f"\n2D arrays for {fourth_file}:")
-for arr in file_rows_dict[fourth_file]:
-    print(arr)
\ No newline at end of file
+for file, (labels, years, values) in file_rows_dict.items():
+    print(f"2D array for {file}: {values.shape[0]} industries x {values.shape[1]} years "
+          f"({years[0]}-{years[-1]})")
+    print(pd.DataFrame(values, index=pd.Index(labels, name="Industry"), columns=years, copy=False).to_string())
+    print()
@@ -1,5 +1,5 @@
-import pandas as pd
-from gr import plot_all_numeric_columns
+import argparse
+from gr import plot_all_numeric_columns, plot_year_grid
 
 clean_files = [
     "compensation_clean.csv",
@@ -8,5 +8,14 @@ clean_files = [
     "employment_clean.csv"
 ]
 
+parser = argparse.ArgumentParser(description="Plot every year of the cleaned CSVs.")
+parser.add_argument("--grid", action="store_true",
+                    help="One small-multiples PNG per file instead of one PNG per (file, year).")
+parser.add_argument("--workers", type=int, default=None, help="Plot the files in this many processes.")
+args = parser.parse_args()
+
 # Save folder can be "." for current directory, or specify e.g., "plots"
-plot_all_numeric_columns(clean_files, save_folder=".")
\ No newline at end of file
+if args.grid:
+    plot_year_grid(clean_files, save_folder=".", max_workers=args.workers)
+else:
+    plot_all_numeric_columns(clean_files, save_folder=".", max_workers=args.workers)
@@ -1,3 +1,6 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
@@ -10,25 +13,94 @@ def clean_df(df):
     df_clean = df_clean.dropna(how='all')
     return df_clean
 
-def plot_all_numeric_columns(files, save_folder="."):
-    for f in files:
-        df = pd.read_csv(f, index_col=0)
-        df = df.apply(pd.to_numeric, errors='coerce').dropna(how='all')
-        
-        numeric_cols = df.columns.tolist()
-        
-        for col in numeric_cols:
-            df_melted = df.reset_index().melt(id_vars="Industry", value_vars=[col],
-                                             var_name="Year", value_name="Value")
-            
-            plt.figure(figsize=(14,7))
-            ax = sns.lineplot(data=df_melted, x="Year", y="Value", hue="Industry", marker="o")
+def load_long(f):
+    """Read a cleaned CSV once and melt it to long form (Industry, Year, Value)."""
+    df = clean_df(pd.read_csv(f, index_col=0))
+    return df.reset_index().melt(id_vars="Industry", var_name="Year", value_name="Value")
+
+def _use_agg():
+    import matplotlib
+    # Worker processes only save files, so they need no GUI backend
+    matplotlib.use("Agg", force=True)
+
+def _map_files(fn, files, save_folder, max_workers, **kwargs):
+    """Run fn(f, save_folder, **kwargs) for every file, across max_workers processes if > 1."""
+    if max_workers is None or max_workers <= 1 or len(files) <= 1:
+        return [fn(f, save_folder, **kwargs) for f in files]
+    with ProcessPoolExecutor(min(max_workers, len(files)), initializer=_use_agg) as executor:
+        futures = [executor.submit(fn, f, save_folder, **kwargs) for f in files]
+        return [future.result() for future in futures]
+
+def _plot_years(f, save_folder):
+    long = load_long(f)
+    # One figure for the whole file: each year clears and redraws the same axes
+    fig, ax = plt.subplots(figsize=(14,7))
+    saved = []
+    try:
+        for col, df_melted in long.groupby("Year", sort=False):
+            ax.clear()
+            sns.lineplot(data=df_melted, x="Year", y="Value", hue="Industry", marker="o", ax=ax)
             ax.set_title(f"{col} Across Industries ({f})")
             ax.set_xlabel("Year")
             ax.set_ylabel(col)
             ax.legend(bbox_to_anchor=(1.05,1), loc='upper left')
-            
+
             safe_name = str(col).replace(" ", "_").replace("/", "_")
-            plt.savefig(f"{save_folder}/{f.split('.')[0]}_{safe_name}.png", bbox_inches='tight')
-            plt.close()
+            path = f"{save_folder}/{f.split('.')[0]}_{safe_name}.png"
+            fig.savefig(path, bbox_inches='tight')
+            saved.append(path)
             print(f"Saved plot for {col} from {f}")
+    finally:
+        plt.close(fig)
+    return saved
+
+def plot_all_numeric_columns(files, save_folder=".", max_workers=None):
+    """
+    One PNG per (file, year column), named <file>_<year>.png.
+    Each file is melted once and its years drawn on one reused figure;
+    with max_workers > 1 the files are plotted in parallel processes.
+    Returns the saved paths, file by file.
+    """
+    return [path for saved in _map_files(_plot_years, files, save_folder, max_workers) for path in saved]
+
+def _plot_grid(f, save_folder, col_wrap):
+    long = load_long(f)
+    years = list(dict.fromkeys(long["Year"]))
+    ncols = min(col_wrap, len(years))
+    nrows = math.ceil(len(years) / ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(4 * ncols, 3.5 * nrows), squeeze=False)
+    try:
+        # Same colour for an industry in every panel
+        industries = list(dict.fromkeys(long["Industry"]))
+        palette = dict(zip(industries, sns.color_palette("husl", len(industries))))
+        for ax, (col, df_year) in zip(axes.flat, long.groupby("Year", sort=False)):
+            # Each panel is a single year, so one scatter per panel stands in for a line per industry
+            ax.scatter([0] * len(df_year), df_year["Value"], c=[palette[i] for i in df_year["Industry"]],
+                       marker="o", edgecolors="white", linewidths=0.75)
+            ax.set_xticks([0], [str(col)])
+            ax.set_title(str(col))
+        for ax in axes.flat[len(years):]:
+            ax.set_visible(False)
+
+        handles = [plt.Line2D([], [], color=palette[i], marker="o") for i in industries]
+        fig.legend(handles, industries, title="Industry", bbox_to_anchor=(1.0, 0.5), loc='center left',
+                   fontsize='small')
+        fig.suptitle(f"Values Across Industries by Year ({f})")
+        fig.supylabel("Value")
+        fig.tight_layout()
+
+        path = f"{save_folder}/{f.split('.')[0]}_by_year.png"
+        fig.savefig(path, bbox_inches='tight')
+        print(f"Saved small multiples for {f}")
+    finally:
+        plt.close(fig)
+    return path
+
+def plot_year_grid(files, save_folder=".", col_wrap=4, max_workers=None):
+    """
+    One small-multiples PNG per file, <file>_by_year.png, with a panel per year column
+    and a single shared legend, instead of a separate figure per year.
+    With max_workers > 1 the files are plotted in parallel processes.
+    Returns the saved paths.
+    """
+    return _map_files(_plot_grid, files, save_folder, max_workers, col_wrap=col_wrap)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+bea_dataset.py
+Every BEA table in the repo as one long-format columnar dataset: (table, industry, label, level, year, value).
+
+    python bea_dataset.py [--out ../data/bea_dataset]
+
+The ingest parses each CSV once: the raw BEA tables in CDC/ (through
+utils.read_bea_table, addendum included) and the backend's year-by-industry
+CSVs in data/. Each column is stored as its own .npy file. table, industry
+(the label-based key of industry_tree.industry_keys) and label (the raw
+label, indentation and footnotes included) are dictionary-encoded as
+integer codes into DICTIONARIES, and level is the indentation depth. Rows
+are grouped by table, and index.json records each table's row range and the
+hash of the CSV it came from.
+
+Reads memory-map only the columns asked for (column pushdown). They slice
+the row ranges of the tables asked for (predicate pushdown), then filter
+industries and years on the integer codes. Nothing is parsed from text.
+load_bea_table and the backend's registry use a stored table only while its
+hash matches the CSV on disk, and parse the CSV as before otherwise. When
+pyarrow is installed the ingest also writes bea.parquet with
+dictionary-encoded columns, for tools that read Arrow.
+
+The dataset is derived from the CSVs, so it is not committed: the first
+open_dataset() of DATASET_DIR builds it from every CSV, and running this
+script rebuilds it after the CSVs change.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Sequence
+import pandas as pd
+import numpy as np
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "bea_dataset")
+
+COLUMNS = {"table": np.int16, "industry": np.int32, "label": np.int32, "level": np.int8, "year": np.int16,
+           "value": np.float64}
+DICTIONARIES = ("table", "industry", "label")
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def table_name(path: str) -> str:
+    """Name a CSV is stored under: its file name without the extension."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# ----- Ingest -----
+
+def _bea_rows(path: str):
+    # Raw BEA table: rows are industries, columns years
+    from utils import read_bea_table
+    df = read_bea_table(path, drop_empty=False, addendum=True)
+    main_rows = len(read_bea_table(path, drop_empty=False))
+    return list(df.index), [int(y) for y in df.columns], df.to_numpy(dtype=np.float64), \
+        {"layout": "bea", "main_rows": main_rows}
+
+
+def _backend_rows(path: str):
+    # Backend CSV: rows are years (first column), columns industries
+    df = pd.read_csv(path)
+    values = df.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64).T
+    # Columns read_csv parses as integers, so loads can give them back the same dtype
+    integer = [i for i, dtype in enumerate(df.dtypes.iloc[1:]) if pd.api.types.is_integer_dtype(dtype)]
+    return list(df.columns[1:]), df.iloc[:, 0].astype(int).tolist(), values, \
+        {"layout": "backend", "integer_columns": integer}
+
+
+def ingest(bea_paths: Sequence[str], backend_paths: Sequence[str], out_dir: str = DATASET_DIR) -> Dict[str, dict]:
+    """
+    Convert the CSVs into the dataset at out_dir, replacing it. Returns the table index.
+    """
+    from industry_tree import IndustryTree, industry_keys
+
+    parts = {name: [] for name in COLUMNS}
+    dictionaries = {name: {} for name in DICTIONARIES}
+    tables, start = {}, 0
+
+    def encode(column, values):
+        codes = dictionaries[column]
+        return [codes.setdefault(value, len(codes)) for value in values]
+
+    for path, reader in [(p, _bea_rows) for p in bea_paths] + [(p, _backend_rows) for p in backend_paths]:
+        labels, years, values, info = reader(path)
+        tree = IndustryTree(labels)
+        keys = industry_keys(pd.DataFrame(index=labels))
+        n_rows = len(labels) * len(years)
+        parts["table"].append(np.full(n_rows, encode("table", [table_name(path)])[0]))
+        parts["industry"].append(np.repeat(encode("industry", keys), len(years)))
+        parts["label"].append(np.repeat(encode("label", labels), len(years)))
+        parts["level"].append(np.repeat(tree.depth, len(years)))
+        parts["year"].append(np.tile(years, len(labels)))
+        parts["value"].append(values.reshape(-1))
+        tables[table_name(path)] = {"rows": [start, start + n_rows], "years": years, **info,
+                                    "source": os.path.basename(path), "hash": _hash_file(path)}
+        start += n_rows
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, dtype in COLUMNS.items():
+        column = np.concatenate(parts[name]).astype(dtype) if parts[name] else np.empty(0, dtype)
+        # Replaced whole, so a reader never maps a column another ingest is still writing
+        tmp_path = os.path.join(out_dir, f"{name}.tmp.npy")
+        np.save(tmp_path, column)
+        os.replace(tmp_path, os.path.join(out_dir, f"{name}.npy"))
+    index = {"tables": tables, "dictionaries": {name: list(codes) for name, codes in dictionaries.items()}}
+    # index.json goes last: readers check it, so they never pair it with half-written columns
+    tmp_path = os.path.join(out_dir, "index.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(out_dir, "index.json"))
+
+    try:
+        import pyarrow  # noqa: F401 - optional
+    except ImportError:
+        pass
+    else:
+        read(out_dir).to_parquet(os.path.join(out_dir, "bea.parquet"), index=False)
+    return tables
+
+
+# ----- Read -----
+
+class Dataset:
+    """An opened dataset: its index, with each column memory-mapped on first use."""
+
+    def __init__(self, path: str = DATASET_DIR):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        self.tables = index["tables"]
+        self.dictionaries = index["dictionaries"]
+        self._codes = {name: {value: i for i, value in enumerate(values)}
+                       for name, values in self.dictionaries.items()}
+        self._columns = {}
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def current(self, name: str, source: str) -> bool:
+        """Whether table name was ingested from a file with the same contents as source."""
+        return name in self.tables and self.tables[name]["hash"] == _hash_file(source)
+
+    def read(self, tables: Optional[Sequence[str]] = None, industries: Optional[Sequence[str]] = None,
+             years: Optional[Sequence[int]] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Long-format rows of the given tables, industries (keys) and years, with only the
+        given columns (default: all). table, industry and label come back as categoricals.
+        """
+        names = list(self.tables) if tables is None else list(tables)
+        unknown = [name for name in names if name not in self.tables]
+        if unknown:
+            raise KeyError(f"Unknown table(s) {unknown}. Choose from {list(self.tables)}.")
+        columns = list(COLUMNS) if columns is None else list(columns)
+        rows = np.concatenate([np.arange(*self.tables[name]["rows"]) for name in names]) if names else np.empty(0, int)
+        if industries is not None:
+            codes = [self._codes["industry"][i] for i in industries if i in self._codes["industry"]]
+            rows = rows[np.isin(self.column("industry")[rows], codes)]
+        if years is not None:
+            rows = rows[np.isin(self.column("year")[rows], list(years))]
+
+        out = {}
+        for name in columns:
+            values = self.column(name)[rows]
+            if name in DICTIONARIES:
+                values = pd.Categorical.from_codes(values, categories=self.dictionaries[name])
+            out[name] = values
+        return pd.DataFrame(out)
+
+    def matrix(self, name: str):
+        """A table's raw labels, years and (industry x year) values."""
+        info = self.tables[name]
+        start, stop = info["rows"]
+        n_years = len(info["years"])
+        labels = self.column("label")[start:stop:n_years]
+        values = np.asarray(self.column("value")[start:stop]).reshape(-1, n_years)
+        return [self.dictionaries["label"][code] for code in labels], info["years"], values
+
+
+_opened: Dict[str, tuple] = {}
+
+
+def open_dataset(path: str = DATASET_DIR) -> Optional[Dataset]:
+    """
+    The dataset at path (reopened when it is re-ingested), or None if there is none.
+    DATASET_DIR is built on first use; None if it cannot be written.
+    """
+    index_path = os.path.join(path, "index.json")
+    if path == DATASET_DIR and not os.path.exists(index_path):
+        try:
+            build(path)
+        except OSError:
+            return None
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return None
+    if path not in _opened or _opened[path][0] != mtime:
+        _opened[path] = (mtime, Dataset(path))
+    return _opened[path][1]
+
+
+def read(path: str = DATASET_DIR, **filters) -> pd.DataFrame:
+    """Dataset(path).read(**filters)."""
+    return Dataset(path).read(**filters)
+
+
+def load_bea_table(path: str, drop_empty: bool = True, addendum: bool = False,
+                   dataset_dir: str = DATASET_DIR) -> pd.DataFrame:
+    """
+    utils.read_bea_table(path, drop_empty, addendum), taken from the dataset when it holds
+    the same version of path, and parsed from the CSV otherwise.
+    """
+    dataset = open_dataset(dataset_dir)
+    name = table_name(path)
+    if dataset is None or not dataset.current(name, path) or dataset.tables[name]["layout"] != "bea":
+        from utils import read_bea_table
+        return read_bea_table(path, drop_empty=drop_empty, addendum=addendum)
+
+    labels, years, values = dataset.matrix(name)
+    if not addendum:
+        rows = dataset.tables[name]["main_rows"]
+        labels, values = labels[:rows], values[:rows]
+    df = pd.DataFrame(values, index=pd.Index(labels, name="Industry"),
+                      columns=pd.Index([str(y) for y in years], dtype=object))
+    if drop_empty:
+        df = df.dropna(how="all")
+    return df
+
+
+def load_backend_table(path: str, dataset_dir: str = DATASET_DIR, digest: Optional[str] = None
+                       ) -> Optional[pd.DataFrame]:
+    """
+    One of the backend's year x industry CSVs as pd.read_csv would return it (with
+    placeholders already NaN), if the dataset holds the same version of it; else None.
+    digest is the hash of the contents the caller read, to check against instead of the file.
+    """
+    dataset = open_dataset(dataset_dir)
+    name = table_name(path)
+    if dataset is None or name not in dataset.tables or dataset.tables[name]["layout"] != "backend":
+        return None
+    if (dataset.tables[name]["hash"] != digest) if digest else not dataset.current(name, path):
+        return None
+    labels, years, values = dataset.matrix(name)
+    df = pd.DataFrame(values.T, columns=labels)
+    for i in dataset.tables[name]["integer_columns"]:
+        df[labels[i]] = df[labels[i]].astype(np.int64)
+    df.insert(0, "Unnamed: 0", np.asarray(years, dtype=np.int64))
+    return df
+
+
+def build(out_dir: str = DATASET_DIR) -> Dict[str, dict]:
+    """
+    Ingest every raw BEA table in CDC/ and every backend CSV in data/ into out_dir.
+    Returns the table index.
+    """
+    from utils import _BEA_HEADER
+    here = os.path.dirname(os.path.abspath(__file__))
+    bea_paths = []
+    for path in sorted(glob.glob(os.path.join(here, "*.csv"))):
+        if path.endswith("_clean.csv"):
+            continue  # derived copies, not source tables
+        with open(path, encoding="utf-8-sig") as f:
+            if _BEA_HEADER.search(f.read()):
+                bea_paths.append(path)
+    backend_paths = sorted(glob.glob(os.path.join(here, "..", "data", "*.csv")))
+    return ingest(bea_paths, backend_paths, out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert every BEA table into one columnar dataset.")
+    parser.add_argument("--out", default=DATASET_DIR)
+    args = parser.parse_args()
+
+    tables = build(args.out)
+    rows = sum(stop - start for start, stop in (t["rows"] for t in tables.values()))
+    print(f"Ingested {len(tables)} tables ({rows} rows) into {os.path.normpath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
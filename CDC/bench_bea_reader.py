@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+bench_bea_reader.py
+Benchmark utils.read_bea_table against utils.read_and_clean_csv on a synthetically enlarged BEA table,
+and sequential against concurrent loading of several such tables.
+
+    python bench_bea_reader.py [--source FILE] [--copies 500] [--files 4] [--repeat 3]
+
+The enlarged table keeps the source's title rows, addendum and footnotes and repeats its data rows
+`copies` times (with renumbered lines and distinct labels), so both readers see the real layout.
+"""
+
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from utils import read_and_clean_csv, read_bea_table, read_bea_tables
+
+
+def enlarge_table(source: str, copies: int, out_path: str) -> int:
+    """Write `source` with its data rows repeated `copies` times; returns the number of data rows written."""
+    with open(source, encoding="utf-8-sig") as f:
+        lines = f.read().split("\n")
+    header = next(i for i, line in enumerate(lines) if re.match(r"^[^,]*,[^,]*,\s*\d{4}", line))
+    end = header + 1
+    while end < len(lines) and re.match(r"^\d+,", lines[end]):
+        end += 1
+    rows = lines[header + 1:end]
+
+    enlarged = []
+    for copy in range(copies):
+        for row in rows:
+            number, rest = row.split(",", 1)
+            label_end = rest.find('",') + 1 if rest.startswith('"') else rest.find(",")
+            label = rest[:label_end]
+            label = label[:-1] + f' #{copy}"' if label.endswith('"') else f"{label} #{copy}"
+            enlarged.append(f"{len(enlarged) + 1},{label}{rest[label_end:]}")
+    with open(out_path, "w", encoding="utf-8-sig") as f:
+        f.write("\n".join(lines[:header + 1] + enlarged + lines[end:]))
+    return len(enlarged)
+
+
+def best_time(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BEA table readers.")
+    parser.add_argument("--source", default="Space Economy Real Gross Output by Industry.csv")
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {f"table{i}": os.path.join(tmp, f"table{i}.csv") for i in range(args.files)}
+        for path in paths.values():
+            n_rows = enlarge_table(args.source, args.copies, path)
+        first = next(iter(paths.values()))
+        print(f"Synthetic table: {n_rows} data rows x {args.files} file(s)")
+
+        old = read_and_clean_csv(first)
+        new = read_bea_table(first)
+        print(f"Values parsed:   read_and_clean_csv {int(old.notna().sum().sum())}, "
+              f"read_bea_table {int(new.notna().sum().sum())}")
+
+        t_old = best_time(lambda: read_and_clean_csv(first), args.repeat)
+        t_new = best_time(lambda: read_bea_table(first), args.repeat)
+        print(f"One table:       read_and_clean_csv {t_old:.3f}s, read_bea_table {t_new:.3f}s "
+              f"({t_old / t_new:.1f}x)")
+
+        t_seq = best_time(lambda: [read_bea_table(p) for p in paths.values()], args.repeat)
+        t_par = best_time(lambda: read_bea_tables(paths), args.repeat)
+        print(f"{args.files} tables:        sequential {t_seq:.3f}s, concurrent {t_par:.3f}s "
+              f"({t_seq / t_par:.1f}x on {os.cpu_count()} CPU(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# cagr_engine.py
+"""CAGR of every industry over every (start year, end year) window, computed once and cached as a cube."""
+
+from typing import Dict, Optional, Sequence
+import hashlib
+import os
+import pandas as pd
+import numpy as np
+
+from industry_tree import industry_keys
+from bea_dataset import load_bea_table
+
+# Tables covered by the cube, in order
+CAGR_FILES = {
+    "real_value_added": "Space Economy Real Value Added by Industry.csv",
+    "employment": "Space Economy Employment by Industry.csv",
+    "gross_output": "Space Economy Real Gross Output by Industry.csv",
+}
+
+CACHE_DIR = ".cagr_cache"
+
+# Code that shapes the cached cube: this engine, the readers and the industry keys
+CODE_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+              for name in ("cagr_engine.py", "bea_dataset.py", "utils.py", "industry_tree.py")]
+
+
+def cagr_cube(values: np.ndarray, years: Sequence[int]) -> np.ndarray:
+    """
+    CAGR (%) of every row of values (... x year) for every (start, end) pair of years.
+
+    Returns an array shaped (... x start x end) where [..., i, j] is the
+    compound annual growth from years[i] to years[j]; it is NaN unless j > i
+    and both values are positive. Computed from log differences in one
+    broadcast, so the cost is rows x years^2 with no Python loop.
+    """
+    years = np.asarray(years, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.where(values > 0, np.log(values), np.nan)
+        span = years[None, :] - years[:, None]
+        span[span <= 0] = np.nan
+        growth = (logs[..., None, :] - logs[..., :, None]) / span
+        return np.expm1(growth) * 100
+
+
+class CagrCube:
+    """
+    CAGR of each table x industry x start year x end year.
+
+    Industries are matched across tables by label (see industry_keys); an
+    industry missing from a table is NaN there. Windows, rankings and
+    heatmaps are slices of the cube, so none of them recomputes anything.
+    """
+
+    def __init__(self, tables: Sequence[str], industries: Sequence[str], years: Sequence[int], cube: np.ndarray):
+        self.tables = list(tables)
+        self.industries = list(industries)
+        self.years = [int(y) for y in years]
+        self.cube = cube
+        self._table_index = {name: i for i, name in enumerate(self.tables)}
+        self._year_index = {year: i for i, year in enumerate(self.years)}
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame]) -> "CagrCube":
+        """Cube of read_bea_table(path, drop_empty=False) frames keyed by table name."""
+        keyed = {}
+        for name, df in frames.items():
+            df = df.copy()
+            df.index = industry_keys(df)
+            keyed[name] = df
+        industries = list(dict.fromkeys(key for df in keyed.values() for key in df.index))
+        years = [y for y in next(iter(keyed.values())).columns if all(y in df.columns for df in keyed.values())]
+        values = np.stack([df.reindex(index=industries, columns=years).to_numpy(dtype=float)
+                           for df in keyed.values()])
+        return cls(list(keyed), industries, [int(y) for y in years], cagr_cube(values, [int(y) for y in years]))
+
+    @classmethod
+    def load(cls, files: Optional[Dict[str, str]] = None, cache_dir: str = CACHE_DIR) -> "CagrCube":
+        """
+        Cube of the BEA CSVs in files (default CAGR_FILES), read from cache_dir when the
+        same file contents were computed before.
+        """
+        files = dict(files or CAGR_FILES)
+        digest = hashlib.sha256()
+        # The code is part of the key, so a change to it invalidates the cache
+        for path in CODE_FILES:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        for name, path in files.items():
+            with open(path, "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read())
+        cache_path = os.path.join(cache_dir, f"cagr-{digest.hexdigest()[:16]}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                return cls(data["tables"].tolist(), data["industries"].tolist(), data["years"].tolist(), data["cube"])
+
+        cube = cls.from_frames({name: load_bea_table(path, drop_empty=False) for name, path in files.items()})
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp.npz"
+        np.savez(tmp_path, tables=np.array(cube.tables), industries=np.array(cube.industries),
+                 years=np.array(cube.years), cube=cube.cube)
+        os.replace(tmp_path, cache_path)
+        return cube
+
+    def _window(self, start: Optional[int], end: Optional[int]):
+        start = self.years[0] if start is None else int(start)
+        end = self.years[-1] if end is None else int(end)
+        if start not in self._year_index or end not in self._year_index or end <= start:
+            raise ValueError(f"Window {start}-{end} is not within {self.years[0]}-{self.years[-1]} "
+                             "with the start before the end.")
+        return self._year_index[start], self._year_index[end]
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None) -> pd.DataFrame:
+        """CAGR (%) from start to end (default: the whole span), industries x tables."""
+        i, j = self._window(start, end)
+        return pd.DataFrame(self.cube[:, :, i, j].T, index=self.industries, columns=self.tables)
+
+    def ranking(self, table: str, start: Optional[int] = None, end: Optional[int] = None, n: int = 10) -> pd.Series:
+        """The n industries with the highest CAGR in table over the window, highest first."""
+        return self.window(start, end)[table].dropna().sort_values(ascending=False).head(n)
+
+    def windows(self, table: str, industry: str) -> pd.DataFrame:
+        """Every window's CAGR for one industry: start years x end years."""
+        values = self.cube[self._table_index[table], self.industries.index(industry)]
+        return pd.DataFrame(values, index=pd.Index(self.years, name="start"),
+                            columns=pd.Index(self.years, name="end"))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+deflator.py
+GDP deflator and implied inflation of every industry, from the nominal and real value added tables.
+
+    python deflator.py [--data-dir ../data]
+
+The two tables are matched by industry label and year (see industry_tree.industry_keys),
+and the deflator (nominal / real * 100) and its YoY % change are computed for all
+industries at once as matrices. The result is cached in CACHE_DIR for the plotting
+scripts; run this script to also export it for the backend, as CSVs laid out like the
+other files in data/ (one row per year, one column per industry).
+"""
+
+import argparse
+import hashlib
+import os
+from typing import Dict, Optional
+import pandas as pd
+import numpy as np
+
+from industry_tree import industry_keys
+from metrics_engine import pct_change
+from bea_dataset import load_bea_table
+
+DEFLATOR_FILES = {
+    "nominal": "Space Economy Value Added by Industry.csv",
+    "real": "Space Economy Real Value Added by Industry.csv",
+}
+
+CACHE_DIR = ".deflator_cache"
+
+# Code that shapes the cached matrices: this module, the readers and the industry keys
+CODE_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+              for name in ("deflator.py", "bea_dataset.py", "utils.py", "industry_tree.py")]
+
+# Backend copies of the matrices, read by backend/registry.py
+EXPORTS = {
+    "deflator": "GDP_Deflator_By_Industry.csv",
+    "inflation": "Implied_Inflation_By_Industry.csv",
+}
+
+# Total the scripts plot: the addendum line that leaves out satellite TV/radio and education
+TOTAL = "Space economy excluding satellite television, satellite radio, and educational services"
+
+
+class DeflatorMatrix:
+    """
+    Nominal and real value added, GDP deflator and implied inflation, each an industry x year matrix.
+
+    deflator is nominal / real * 100, NaN where real value added is missing
+    or not positive; inflation is the deflator's YoY % change, NaN in the
+    first year.
+    """
+
+    def __init__(self, industries, years, nominal: np.ndarray, real: np.ndarray):
+        self.industries = list(industries)
+        self.years = [int(y) for y in years]
+        self.nominal = nominal
+        self.real = real
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.deflator = np.where(real > 0, nominal / real * 100, np.nan)
+        self.inflation = pct_change(self.deflator)
+        self._index = {industry: i for i, industry in enumerate(self.industries)}
+
+    @classmethod
+    def from_frames(cls, nominal: pd.DataFrame, real: pd.DataFrame) -> "DeflatorMatrix":
+        """Matrices of read_bea_table(path, drop_empty=False, addendum=True) frames."""
+        nominal, real = nominal.copy(), real.copy()
+        nominal.index = industry_keys(nominal)
+        real.index = industry_keys(real)
+        industries = [key for key in nominal.index if key in real.index]
+        years = [y for y in nominal.columns if y in real.columns]
+        return cls(industries, years, nominal.loc[industries, years].to_numpy(dtype=float),
+                   real.loc[industries, years].to_numpy(dtype=float))
+
+    @classmethod
+    def load(cls, files: Optional[Dict[str, str]] = None, cache_dir: str = CACHE_DIR) -> "DeflatorMatrix":
+        """
+        Matrices of the nominal and real CSVs in files (default DEFLATOR_FILES), read from
+        cache_dir when the same file contents were computed before.
+        """
+        files = dict(files or DEFLATOR_FILES)
+        digest = hashlib.sha256()
+        # The code is part of the key, so a change to it invalidates the cache
+        for path in CODE_FILES:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        for name in ("nominal", "real"):
+            with open(files[name], "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read())
+        cache_path = os.path.join(cache_dir, f"deflator-{digest.hexdigest()[:16]}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                return cls(data["industries"].tolist(), data["years"].tolist(), data["nominal"], data["real"])
+
+        matrix = cls.from_frames(*(load_bea_table(files[name], drop_empty=False, addendum=True)
+                                   for name in ("nominal", "real")))
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp.npz"
+        np.savez(tmp_path, industries=np.array(matrix.industries), years=np.array(matrix.years),
+                 nominal=matrix.nominal, real=matrix.real)
+        os.replace(tmp_path, cache_path)
+        return matrix
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """'nominal', 'real', 'deflator' or 'inflation' as a DataFrame (industries x years)."""
+        return pd.DataFrame(getattr(self, name), index=self.industries, columns=self.years)
+
+    def series(self, name: str, industry: str) -> pd.Series:
+        """One industry's row of a matrix, by label."""
+        if industry not in self._index:
+            raise KeyError(f"No industry '{industry}' in both value added tables.")
+        return pd.Series(getattr(self, name)[self._index[industry]], index=self.years, name=industry)
+
+    def export(self, data_dir: str) -> Dict[str, str]:
+        """Writes the deflator and inflation matrices as year x industry CSVs; returns the paths."""
+        paths = {}
+        for name, filename in EXPORTS.items():
+            path = os.path.join(data_dir, filename)
+            self.frame(name).T.to_csv(path)
+            paths[name] = path
+        return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the GDP deflator and implied inflation of every industry.")
+    parser.add_argument("--data-dir", default=os.path.join("..", "data"), help="Where the backend reads its CSVs.")
+    args = parser.parse_args()
+
+    matrix = DeflatorMatrix.load()
+    for name, path in matrix.export(args.data_dir).items():
+        print(f"Saved {name} for {len(matrix.industries)} industries: {path}")
+
+
+if __name__ == "__main__":
+    main()
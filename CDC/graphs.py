@@ -1,16 +1,203 @@
 # graphs.py
-"""Plotting helpers used by both pipelines. Uses seaborn + matplotlib for clean visuals."""
+"""
+Plotting layer shared by the pipelines. Uses seaborn + matplotlib for clean visuals.
 
-from typing import List
+Every figure goes through render(), which hashes the plot's input data, its
+options, its theme and the code that draws it, and skips drawing when the
+file on disk was already rendered from exactly those inputs. The hash of
+each artifact is kept in STAMP_DIR. MODE (or a plot's mode argument) picks
+the output:
+
+    final     PNG at 300 dpi, to the given path
+    preview   PNG at 72 dpi, to <name>.preview.png, for quick iteration
+    svg, pdf  vector output, to <name>.svg / <name>.pdf
+
+The default comes from the PLOT_MODE environment variable.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, List
+import hashlib
+import inspect
+import json
+import os
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
-import os
 
-sns.set(style="whitegrid", context="talk")
+from plot_modes import MODES, MODE, output_path  # noqa: F401 - re-exported for the plotting scripts
 
-def save_line_plot(df: pd.DataFrame, title: str, ylabel: str, out_path: str,
-                   top_n_legend: int = None, figsize=(12,6), markers=True):
+STAMP_DIR = ".plot_cache"
+
+# The pipelines' sns.set(style="whitegrid"); save_line_plot adds context="talk"
+PIPELINE_STYLE = {"style": "whitegrid"}
+
+# Metadata matplotlib would otherwise fill with the current date, so vector files are reproducible
+_NO_DATE = {"svg": {"Date": None}, "pdf": {"CreationDate": None}, "png": None}
+
+
+def abbreviate_industry(name, max_words=4):
+    """Abbreviate long industry names for legend."""
+    words = name.strip().split()
+    if len(words) > max_words:
+        return ' '.join(words[:2]) + '...'  # keep first 2 words and add ellipsis
+    return name.strip()
+
+
+@contextmanager
+def theme(**style):
+    """Seaborn theme for the duration of one figure; the caller's rc settings are restored after."""
+    with matplotlib.rc_context():
+        sns.set_theme(**style)
+        # Fixed salt for the element ids of SVG output
+        matplotlib.rcParams["svg.hashsalt"] = "graphs"
+        yield
+
+
+def _hash_value(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.index), list(value.columns))).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(value, index=False).values.tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode("utf-8"))
+        for item in value:
+            _hash_value(digest, item)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(repr(key).encode("utf-8"))
+            _hash_value(digest, value[key])
+    else:
+        digest.update(repr(value).encode("utf-8"))
+
+
+def plot_key(draw: Callable, args: tuple, options: dict, style: dict, mode: str) -> str:
+    """Hash of everything that determines a rendered file."""
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(draw).encode("utf-8"))
+    digest.update(f"{matplotlib.__version__} {sns.__version__} {mode}".encode("utf-8"))
+    _hash_value(digest, [list(args), options, style])
+    return digest.hexdigest()[:16]
+
+
+def _stamp_path(path: str) -> str:
+    name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(STAMP_DIR, f"{name}.json")
+
+
+def is_current(path: str, key: str) -> bool:
+    """Whether path exists and was rendered with key (and not modified since)."""
+    try:
+        with open(_stamp_path(path)) as f:
+            stamp = json.load(f)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return False
+    return stamp == {"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def render(draw: Callable, out_path: str, *args, style: dict = PIPELINE_STYLE, mode: str = None,
+           force: bool = False, **options) -> str:
+    """
+    Draw a figure with draw(*args, **options) under style and save it for mode,
+    unless the existing file was rendered from the same inputs.
+    Returns the path of the file.
+    """
+    mode = mode or MODE
+    path = output_path(out_path, mode)
+    key = plot_key(draw, args, options, style, mode)
+    if not force and is_current(path, key):
+        return path
+
+    settings = MODES[mode]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with theme(**style):
+        try:
+            draw(*args, **options)
+            plt.savefig(path, bbox_inches='tight', dpi=settings["dpi"], format=settings["format"],
+                        metadata=_NO_DATE[settings["format"]])
+        finally:
+            plt.close()
+    stat = os.stat(path)
+    os.makedirs(STAMP_DIR, exist_ok=True)
+    with open(_stamp_path(path), "w") as f:
+        json.dump({"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, f)
+    return path
+
+
+# ----- Figures -----
+
+def draw_industry_lines(df: pd.DataFrame, title: str, ylabel: str, figsize=(18, 10), linewidth=2,
+                        title_fontsize=22):
+    """
+    Plot a DataFrame (industries x years) as a line plot.
+    Automatically abbreviates long legend labels.
+    """
+    df = df.copy()
+    df.index = [abbreviate_industry(i) for i in df.index]
+
+    plt.figure(figsize=figsize)
+    ax = sns.lineplot(data=df.T, marker='o', linewidth=linewidth)
+
+    ax.set_title(title, fontsize=title_fontsize)
+    ax.set_xlabel("Year", fontsize=16)
+    ax.set_ylabel(ylabel, fontsize=16)
+
+    # Legend outside plot
+    ax.legend(title="Industry", bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=10, title_fontsize=12)
+
+    # Adjust layout to avoid warnings
+    plt.tight_layout()
+    plt.subplots_adjust(right=0.75, bottom=0.15, top=0.9)
+
+
+def save_industry_lines(df: pd.DataFrame, title: str, ylabel: str, out_path: str, mode: str = None,
+                        **options) -> str:
+    """draw_industry_lines saved to out_path (see render); options are figsize, linewidth, title_fontsize."""
+    return render(draw_industry_lines, out_path, df, title, ylabel, mode=mode, **options)
+
+
+def draw_multi_metric(metrics: List[pd.DataFrame], titles: List[str], ylabels: List[str]):
+    """
+    Create a multi-panel figure for multiple metrics.
+
+    metrics: list of DataFrames (industries x years)
+    titles: list of subplot titles
+    ylabels: list of y-axis labels
+    """
+    n_metrics = len(metrics)
+    fig, axes = plt.subplots(n_metrics, 1, figsize=(20, 12), sharex=True)
+
+    if n_metrics == 1:
+        axes = [axes]  # ensure iterable
+
+    for ax, df, title, ylabel in zip(axes, metrics, titles, ylabels):
+        df_T = df.T  # transpose for plotting (years x industries)
+        sns.lineplot(data=df_T, ax=ax, marker='o', linewidth=1.8)
+        ax.set_title(title, fontsize=18)
+        ax.set_ylabel(ylabel, fontsize=14)
+        ax.grid(True)
+
+    # Shared x-axis label
+    axes[-1].set_xlabel("Year", fontsize=14)
+
+    # Single legend for all subplots
+    handles, labels = axes[0].get_legend_handles_labels()
+    fig.legend(handles, labels, title="Industry", bbox_to_anchor=(1.02, 0.9), loc='upper left',
+               fontsize=10, title_fontsize=12)
+
+    plt.tight_layout()
+    plt.subplots_adjust(right=0.75, hspace=0.3, bottom=0.15, top=0.95)
+
+
+def save_multi_metric(metrics: List[pd.DataFrame], titles: List[str], ylabels: List[str], out_path: str,
+                      mode: str = None) -> str:
+    """draw_multi_metric saved to out_path (see render)."""
+    return render(draw_multi_metric, out_path, metrics, titles, ylabels, mode=mode)
+
+
+def draw_line_plot(df: pd.DataFrame, title: str, ylabel: str, top_n_legend: int = None, figsize=(12,6),
+                   markers=True):
     """
     df: index=Industry, columns=Year -> we will transpose and plot years on x axis
     top_n_legend: if provided, show only the top N series in legend (others faded) for readability
@@ -21,9 +208,6 @@ def save_line_plot(df: pd.DataFrame, title: str, ylabel: str, out_path: str,
     plt.figure(figsize=figsize)
     # If top_n_legend provided, find top series by mean absolute value across time
     if top_n_legend is not None and top_n_legend < len(df_plot.columns):
-        ranking = df.abs().mean(axis=1).sort_values(ascending=False)  # careful: df is Industries x years; we want mean across years per industry
-        # compute mean across columns of original df (industries) => convert to series
-        # We'll compute means properly:
         means = df.mean(axis=1).abs().sort_values(ascending=False)
         top_inds = means.index[:top_n_legend].tolist()
     else:
@@ -54,6 +238,10 @@ def save_line_plot(df: pd.DataFrame, title: str, ylabel: str, out_path: str,
         plt.legend(loc='center left', bbox_to_anchor=(1.02, 0.5), fontsize='small', ncol=1)
 
     plt.tight_layout()
-    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-    plt.savefig(out_path, bbox_inches='tight', dpi=300)
-    plt.close()
+
+
+def save_line_plot(df: pd.DataFrame, title: str, ylabel: str, out_path: str,
+                   top_n_legend: int = None, figsize=(12,6), markers=True, mode: str = None) -> str:
+    """draw_line_plot saved to out_path (see render), in seaborn's whitegrid style and talk context."""
+    return render(draw_line_plot, out_path, df, title, ylabel, style={"style": "whitegrid", "context": "talk"},
+                  mode=mode, top_n_legend=top_n_legend, figsize=figsize, markers=markers)
@@ -0,0 +1,193 @@
+# industry_tree.py
+"""Parent/child structure of the BEA industry tables, parsed from the indentation of their Industry labels."""
+
+from typing import Dict, List, Sequence, Tuple
+import re
+import pandas as pd
+import numpy as np
+
+# BEA indents each level of the Industry column by four spaces
+INDENT = 4
+
+# Footnote markers glued to the end of a label ("Space economy1", "Government5")
+_FOOTNOTE = re.compile(r"\d+$")
+
+
+def clean_label(label: str) -> str:
+    """Label without its indentation and footnote marker."""
+    return _FOOTNOTE.sub("", str(label).strip()).strip()
+
+
+class IndustryTree:
+    """
+    Industry hierarchy of one BEA table, with precomputed lookups and aggregation matrices.
+
+    Build it from the raw labels, in table order, as read_bea_table keeps them
+    (with their leading spaces). Each row's parent is the nearest row above it
+    that is indented less; rows at the top level (the total, addendum lines)
+    are roots. Nodes are numbered by their position in the table, so they line
+    up with the rows of the frame the tree was built from.
+
+    Some names occur more than once ("General government" under both Federal
+    and State and local); `path` tells them apart, and `locate` takes either a
+    unique name or a "Parent/Child" path suffix. Roll-ups and checks are
+    matrix products, so they cost one pass over the values however deep the
+    tree is:
+
+    - `aggregation` is nodes x leaves, 1 where the leaf lies under the node,
+      so aggregation @ leaf_values gives every subtotal at once
+    - `children_matrix` is nodes x nodes, 1 where the column is a direct child
+      of the row, so children_matrix @ values gives each parent's children's sum
+    """
+
+    def __init__(self, labels: Sequence[str]):
+        self.labels = list(labels)
+        self.names = [clean_label(label) for label in self.labels]
+        indent = np.array([len(str(label)) - len(str(label).lstrip(" ")) for label in self.labels])
+        self.depth = (indent - indent.min()) // INDENT if len(indent) else indent
+
+        parent = np.full(len(self.labels), -1)
+        stack: List[int] = []  # open ancestors of the current row, shallowest first
+        for i, spaces in enumerate(indent):
+            while stack and indent[stack[-1]] >= spaces:
+                stack.pop()
+            if stack:
+                parent[i] = stack[-1]
+            stack.append(i)
+        self.parent = parent
+
+        self.children: List[List[int]] = [[] for _ in self.labels]
+        for i, p in enumerate(parent):
+            if p >= 0:
+                self.children[p].append(i)
+        self.leaves = np.array([i for i, kids in enumerate(self.children) if not kids], dtype=int)
+        self.paths = [self._path(i) for i in range(len(self.labels))]
+
+        self._by_name: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            self._by_name.setdefault(name, []).append(i)
+        self._by_path = {"/".join(path): i for i, path in enumerate(self.paths)}
+
+        n = len(self.labels)
+        self.children_matrix = np.zeros((n, n))
+        self.children_matrix[parent[parent >= 0], np.flatnonzero(parent >= 0)] = 1.0
+        # Walk each leaf up to its root, marking every ancestor
+        self.aggregation = np.zeros((n, len(self.leaves)))
+        for j, leaf in enumerate(self.leaves):
+            node = leaf
+            while node >= 0:
+                self.aggregation[node, j] = 1.0
+                node = parent[node]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IndustryTree":
+        """Tree of a frame indexed by raw labels, e.g. read_bea_table(path, drop_empty=False)."""
+        return cls(df.index)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def _path(self, i: int) -> Tuple[str, ...]:
+        path = []
+        while i >= 0:
+            path.append(self.names[i])
+            i = self.parent[i]
+        return tuple(reversed(path))
+
+    def locate(self, label: str) -> int:
+        """
+        Position of the node called `label`: a raw or clean name, or a "/"-separated path
+        (or path suffix such as "Federal/General government") where the name is ambiguous.
+        """
+        if label in self._by_path:
+            return self._by_path[label]
+        parts = [clean_label(part) for part in str(label).split("/")]
+        matches = [i for i in self._by_name.get(parts[-1], []) if self.paths[i][-len(parts):] == tuple(parts)]
+        if not matches:
+            raise KeyError(f"No industry '{label}' in the table.")
+        if len(matches) > 1:
+            raise KeyError(f"Industry '{label}' is ambiguous: {['/'.join(self.paths[i]) for i in matches]}. "
+                           "Qualify it with its parent, e.g. 'Parent/Child'.")
+        return matches[0]
+
+    def descendants(self, label: str) -> List[int]:
+        """Positions of every node under `label`, in table order."""
+        node = self.locate(label)
+        end = node + 1
+        # The subtree is the run of rows after the node that are nested deeper than it
+        while end < len(self.labels) and self.depth[end] > self.depth[node]:
+            end += 1
+        return list(range(node + 1, end))
+
+    def level(self, depth: int, df: pd.DataFrame = None):
+        """Positions of the nodes at `depth` (0 = top), or those rows of `df` when given."""
+        positions = np.flatnonzero(self.depth == depth)
+        return positions if df is None else df.iloc[positions]
+
+    def row(self, df: pd.DataFrame, label: str) -> pd.Series:
+        """Row of `df` (in the tree's order) for the industry `label`."""
+        return df.iloc[self.locate(label)]
+
+    def rollup(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Every node's total recomputed from the leaves under it, as a frame shaped like `df`.
+        Missing leaf values count as 0, so compare against df only where its leaves are complete.
+        """
+        leaves = np.nan_to_num(df.to_numpy(dtype=float)[self.leaves])
+        return pd.DataFrame(self.aggregation @ leaves, index=df.index, columns=df.columns)
+
+    def subtotal(self, df: pd.DataFrame, labels: Sequence[str]) -> pd.Series:
+        """Sum of the leaves under any of `labels`, counting each leaf once even if the labels nest."""
+        rows = self.aggregation[[self.locate(label) for label in labels]].max(axis=0)
+        return pd.Series(rows @ np.nan_to_num(df.to_numpy(dtype=float)[self.leaves]), index=df.columns)
+
+    def check_consistency(self, df: pd.DataFrame, rounding: float = 0.5) -> pd.DataFrame:
+        """
+        Parents whose reported values differ from the sum of their children.
+
+        BEA rounds every published value, so a parent may differ from its
+        children's sum by up to `rounding` per child and its own rounding;
+        only larger gaps are reported. Years where the parent or any child is
+        missing are skipped. Chained-dollar (real) tables are not additive by
+        construction, so this is meant for the nominal tables.
+
+        Returns a frame with one row per inconsistent (industry, year):
+        path, year, reported, children_sum and difference.
+        """
+        values = df.to_numpy(dtype=float)
+        missing = np.isnan(values)
+        sums = self.children_matrix @ np.nan_to_num(values)
+        incomplete = (self.children_matrix @ missing) > 0
+        n_children = self.children_matrix.sum(axis=1, keepdims=True)
+        tolerance = rounding * (n_children + 1)
+        gap = values - sums
+        bad = (n_children > 0) & ~missing & ~incomplete & (np.abs(gap) > tolerance)
+        rows, cols = np.nonzero(bad)
+        return pd.DataFrame({
+            "path": ["/".join(self.paths[i]) for i in rows],
+            "year": df.columns[cols],
+            "reported": values[rows, cols],
+            "children_sum": sums[rows, cols],
+            "difference": gap[rows, cols],
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per node: name, depth, parent name, number of children and whether it is a leaf."""
+        return pd.DataFrame({
+            "name": self.names,
+            "depth": self.depth,
+            "parent": [self.names[p] if p >= 0 else None for p in self.parent],
+            "children": [len(kids) for kids in self.children],
+            "leaf": [not kids for kids in self.children],
+        }, index=pd.Index(["/".join(path) for path in self.paths], name="path"))
+
+
+def industry_keys(df: pd.DataFrame) -> List[str]:
+    """
+    Label-based keys for a BEA table's rows, for matching industries across tables: the clean
+    name, or "Parent/Name" where the name occurs more than once (e.g. "Federal/General government").
+    """
+    tree = IndustryTree.from_frame(df)
+    counts = pd.Series(tree.names).value_counts()
+    return [name if counts[name] == 1 or tree.parent[i] < 0 else f"{tree.names[tree.parent[i]]}/{name}"
+            for i, name in enumerate(tree.names)]
@@ -0,0 +1,165 @@
+# metrics_engine.py
+"""Derived labor/wage metrics computed in one vectorized pass over a stacked (table x industry x period) array."""
+
+from typing import Callable, Dict, List, Optional, Sequence
+import pandas as pd
+import numpy as np
+
+# Input tables, in the order they are stacked
+TABLES = ("compensation", "employment", "output")
+
+
+def pct_change(values: np.ndarray) -> np.ndarray:
+    """
+    Percent change along the last (period) axis, like DataFrame.pct_change(axis=1) * 100:
+    the first period is NaN, as is any change from or to a missing value.
+    """
+    out = np.full_like(values, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(values[..., 1:], values[..., :-1], out=out[..., 1:])
+    out[..., 1:] -= 1
+    out[..., 1:] *= 100
+    return out
+
+
+class MetricContext:
+    """
+    What a metric function sees: ctx["employment"] is a table as an (industry x period) array,
+    ctx.pct("employment") its percent change, and ctx["avg_comp"] any metric computed before it.
+    """
+
+    def __init__(self, cube: np.ndarray, tables: Sequence[str]):
+        self._tables = {name: i for i, name in enumerate(tables)}
+        self._cube = cube
+        # Percent change of every input table at once
+        self._pct = pct_change(cube)
+        self._metrics: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name in self._metrics:
+            return self._metrics[name]
+        return self._cube[self._tables[name]]
+
+    def pct(self, name: str) -> np.ndarray:
+        if name in self._tables:
+            return self._pct[self._tables[name]]
+        return pct_change(self._metrics[name])
+
+
+class MetricsEngine:
+    """
+    Registry of derived metrics and the vectorized pass that computes them.
+
+    The aligned input tables are stacked into one contiguous array
+    (table x industry x period) of `dtype`, the percent changes of all of them
+    are taken in a single operation, and each registered metric then runs in
+    registration order, writing into its slice of one preallocated output
+    array (metric x industry x period). Every step is elementwise over that
+    array, so time and memory grow linearly with industries x periods;
+    float32 halves the memory where that precision is enough.
+
+    Register a metric with a function of a MetricContext that returns an
+    (industry x period) array:
+
+        @ENGINE.register("output_per_employee")
+        def output_per_employee(ctx):
+            return ctx["output"] / ctx["employment"]
+    """
+
+    def __init__(self, tables: Sequence[str] = TABLES, dtype=np.float64):
+        self.tables = tuple(tables)
+        self.dtype = np.dtype(dtype)
+        self.metrics: Dict[str, Callable[[MetricContext], np.ndarray]] = {}
+
+    def register(self, name: str, fn: Optional[Callable[[MetricContext], np.ndarray]] = None):
+        """Add (or replace) the metric `name`; usable as a decorator when fn is omitted."""
+        def add(fn):
+            self.metrics[name] = fn
+            return fn
+        return add if fn is None else add(fn)
+
+    def stack(self, tables: Dict[str, pd.DataFrame], dtype=None) -> np.ndarray:
+        """
+        The input tables as one C-contiguous (table x industry x period) array.
+        Raises ValueError unless they share the same industries and periods (see utils.align_dataframes).
+        """
+        first = tables[self.tables[0]]
+        for name in self.tables[1:]:
+            if not (tables[name].index.equals(first.index) and tables[name].columns.equals(first.columns)):
+                raise ValueError(f"Table '{name}' is not aligned with '{self.tables[0]}'; align the tables first.")
+        cube = np.empty((len(self.tables),) + first.shape, dtype=dtype or self.dtype)
+        for i, name in enumerate(self.tables):
+            cube[i] = tables[name].to_numpy(dtype=float)
+        return cube
+
+    def compute(self, tables: Dict[str, pd.DataFrame], metrics: Optional[List[str]] = None,
+                dtype=None) -> Dict[str, pd.DataFrame]:
+        """
+        Compute the registered metrics (or only `metrics`, plus whatever they use that was
+        registered before them) for aligned {table name: DataFrame} inputs.
+        Returns {metric: DataFrame} (industries x periods), each a view on one shared array.
+        """
+        first = tables[self.tables[0]]
+        cube = self.stack(tables, dtype)
+        wanted = list(self.metrics) if metrics is None else metrics
+        unknown = [name for name in wanted if name not in self.metrics]
+        if unknown:
+            raise KeyError(f"Unknown metric(s) {unknown}. Choose from {list(self.metrics)}.")
+
+        # Earlier metrics may feed later ones, so run everything up to the last one asked for
+        names = list(self.metrics)[:max(list(self.metrics).index(name) for name in wanted) + 1] if wanted else []
+        ctx = MetricContext(cube, self.tables)
+        out = np.empty((len(names),) + first.shape, dtype=cube.dtype)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i, name in enumerate(names):
+                out[i] = self.metrics[name](ctx)
+                ctx._metrics[name] = out[i]
+        return {name: pd.DataFrame(out[i], index=first.index, columns=first.columns, copy=False)
+                for i, name in enumerate(names) if name in wanted}
+
+
+ENGINE = MetricsEngine()
+
+
+@ENGINE.register("avg_comp")
+def avg_comp(ctx):
+    """Average compensation per employee (comp / emp)."""
+    values = ctx["compensation"] / ctx["employment"]
+    values[np.isinf(values)] = np.nan
+    return values
+
+
+@ENGINE.register("wage_inflation")
+def wage_inflation(ctx):
+    """YoY % change in avg_comp."""
+    return ctx.pct("avg_comp")
+
+
+@ENGINE.register("pct_emp")
+def pct_emp(ctx):
+    """Employment YoY % change."""
+    return ctx.pct("employment")
+
+
+@ENGINE.register("pct_output")
+def pct_output(ctx):
+    """Output YoY % change."""
+    return ctx.pct("output")
+
+
+@ENGINE.register("labor_hoarding_diff")
+def labor_hoarding_diff(ctx):
+    """pct_emp - pct_output (percentage points)."""
+    return ctx["pct_emp"] - ctx["pct_output"]
+
+
+@ENGINE.register("labor_hoarding_ratio")
+def labor_hoarding_ratio(ctx):
+    """((1+Δemp) / (1+Δout) - 1) * 100 (percent)."""
+    return ((1 + ctx["pct_emp"] / 100.0) / (1 + ctx["pct_output"] / 100.0) - 1) * 100.0
+
+
+def compute_metrics(comp: pd.DataFrame, emp: pd.DataFrame, output: pd.DataFrame,
+                    dtype=np.float64) -> Dict[str, pd.DataFrame]:
+    """The default engine's metrics for aligned compensation, employment and output tables."""
+    return ENGINE.compute({"compensation": comp, "employment": emp, "output": output}, dtype=dtype)
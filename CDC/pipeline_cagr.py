@@ -1,72 +1,85 @@
-import pandas as pd
+import argparse
 import matplotlib.pyplot as plt
-from adjustText import adjust_text  # pip install adjustText
+import seaborn as sns
+try:
+    from adjustText import adjust_text  # pip install adjustText
+except ImportError:
+    adjust_text = None
 
-# ---------------------------
-# 1. Load CSVs
-# ---------------------------
-real_file = r"CDC\Space Economy Real Value Added by Industry.csv"
-employment_file = r"CDC\Space Economy Employment by Industry.csv"
-
-def read_csv_clean(fname):
-    df = pd.read_csv(fname, header=None)
-    # Strip strings
-    df = df.applymap(lambda x: str(x).strip() if isinstance(x, str) else x)
-    return df
-
-real_df = read_csv_clean(real_file)
-emp_df = read_csv_clean(employment_file)
+from cagr_engine import CagrCube
 
 # ---------------------------
-# 2. Extract industry names
+# 1. Load the CAGR cube
 # ---------------------------
-industry_labels = real_df.iloc[:, 1]  # column 2 has industry names
+# Real value added, employment and gross output for every (start, end) window,
+# computed once and cached in .cagr_cache; each window below is a lookup
+parser = argparse.ArgumentParser(description="Plot industry CAGRs over a window of years.")
+parser.add_argument("--start", type=int, default=None, help="First year of the window (default: first year).")
+parser.add_argument("--end", type=int, default=None, help="Last year of the window (default: last year).")
+args = parser.parse_args()
 
-# ---------------------------
-# 3. Compute CAGR
-# ---------------------------
-def compute_cagr(series):
-    series_numeric = pd.to_numeric(series, errors='coerce')
-    series_clean = series_numeric.dropna()
-    if len(series_clean) < 2:
-        return pd.NA
-    first = series_clean.iloc[0]
-    last = series_clean.iloc[-1]
-    n = len(series_clean) - 1
-    if first <= 0 or last <= 0:
-        return pd.NA
-    return ((last / first) ** (1 / n) - 1) * 100  # % CAGR
-
-real_cagr = real_df.iloc[:, 2:].apply(compute_cagr, axis=1)
-emp_cagr = emp_df.iloc[:, 2:].apply(compute_cagr, axis=1)
+cube = CagrCube.load()
+start = args.start or cube.years[0]
+end = args.end or cube.years[-1]
+cagr = cube.window(start, end)
 
 # ---------------------------
-# 4. Filter out invalid values
+# 2. Filter out invalid values
 # ---------------------------
-valid_mask = (~real_cagr.isna()) & (~emp_cagr.isna()) & (emp_cagr > -100)
-real_cagr = real_cagr[valid_mask]
-emp_cagr = emp_cagr[valid_mask]
-industry_labels_filtered = industry_labels[valid_mask]
+valid = cagr.dropna(subset=["real_value_added", "employment"])
+valid = valid[valid["employment"] > -100]
+real_cagr = valid["real_value_added"]
+emp_cagr = valid["employment"]
 
 # ---------------------------
-# 5. Plot scatter
+# 3. Plot scatter
 # ---------------------------
 plt.figure(figsize=(14, 10))
 plt.scatter(emp_cagr, real_cagr, s=150, color='skyblue')
 
 plt.xlabel("Employment CAGR (%)", fontsize=14)
 plt.ylabel("Real Value Added CAGR (%)", fontsize=14)
-plt.title("Space Economy: Real Output vs Employment CAGR (2012-2023)", fontsize=16)
+plt.title(f"Space Economy: Real Output vs Employment CAGR ({start}-{end})", fontsize=16)
 
 # Add industry labels
 texts = []
-for x, y, label in zip(emp_cagr, real_cagr, industry_labels_filtered):
+for x, y, label in zip(emp_cagr, real_cagr, valid.index):
     texts.append(plt.text(x, y, label, fontsize=10))
 
 # Adjust text to reduce overlap
-adjust_text(texts, arrowprops=dict(arrowstyle="-", color='gray', lw=0.5))
+if adjust_text is not None:
+    adjust_text(texts, arrowprops=dict(arrowstyle="-", color='gray', lw=0.5))
 
 plt.grid(True, linestyle='--', alpha=0.5)
 plt.tight_layout()
 plt.savefig("scatter_cagr_labeled.png")
 plt.show()
+
+# ---------------------------
+# 4. Heatmap of every table
+# ---------------------------
+heat = cagr.dropna(how="all")
+plt.figure(figsize=(12, max(8, 0.22 * len(heat))))
+sns.heatmap(heat.rename(columns=lambda c: c.replace("_", " ").title()), annot=True, fmt=".1f", cmap="YlGnBu",
+            annot_kws={"fontsize": 7})
+plt.title(f"CAGR Heatmap by Industry and Metric ({start}-{end})")
+plt.xlabel("Metric")
+plt.ylabel("Industry")
+plt.tight_layout()
+plt.savefig("cagr_heatmap.png")
+plt.show()
+
+# ---------------------------
+# 5. Top 10 real value added CAGR
+# ---------------------------
+top10 = cube.ranking("real_value_added", start, end, n=10)
+plt.figure(figsize=(12, 8))
+bars = plt.barh(top10.index[::-1], top10.values[::-1], color='steelblue')
+for bar, value in zip(bars, top10.values[::-1]):
+    plt.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f"{value:.1f}%", va='center')
+plt.xlabel("CAGR (%)", fontsize=12)
+plt.ylabel("Industry", fontsize=12)
+plt.title(f"Top 10 Industries by Real Value Added CAGR ({start}-{end})", fontsize=14)
+plt.tight_layout()
+plt.savefig("top10_real_cagr_bar.png")
+plt.show()
@@ -1,45 +1,22 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-import numpy as np
+from deflator import TOTAL, DeflatorMatrix
 
-# --- File names ---
-real_file = "Space Economy Real Value Added by Industry.csv"
-nominal_file = "Space Economy Value Added by Industry.csv"
+# --- Nominal and real value added of every industry, matched by label (cached by deflator.py) ---
+matrix = DeflatorMatrix.load()
 
-# --- Read and clean CSV ---
-def read_csv_clean(fname):
-    df = pd.read_csv(fname, header=None)
-    # Strip strings
-    df = df.applymap(lambda x: str(x).strip() if isinstance(x, str) else x)
-    # Detect first numeric column dynamically
-    numeric_cols = [col for col in df.columns if pd.to_numeric(df[col], errors='coerce').notna().any()]
-    first_numeric_col = numeric_cols[0]
-    # Convert numeric columns to float
-    for col in df.columns[first_numeric_col:]:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ""), errors='coerce')
-    return df, first_numeric_col
-
-# --- Read datasets ---
-real_df, real_start_col = read_csv_clean(real_file)
-nominal_df, nominal_start_col = read_csv_clean(nominal_file)
-
-# --- Total row index (11th from bottom) ---
-total_row_idx_real = len(real_df) - 11
-total_row_idx_nominal = len(nominal_df) - 11
-
-# --- Extract totals, skip invalid leading values ---
-real_total = real_df.iloc[total_row_idx_real, real_start_col:].values[2:]       # skip first 2 invalid
-nominal_total = nominal_df.iloc[total_row_idx_nominal, nominal_start_col:].values[2:]
+# --- Total: the addendum line that leaves out satellite TV/radio and education ---
+real_total = matrix.series("real", TOTAL).values
+nominal_total = matrix.series("nominal", TOTAL).values
 
 # --- Years ---
-years_actual = list(range(2012, 2024))  # 2012 to 2023 inclusive
+years_actual = matrix.years  # 2012 to 2023 inclusive
 
-# --- Calculate GDP Deflator and Inflation ---
+# --- GDP Deflator and Inflation, computed for every industry by DeflatorMatrix ---
 # GDP Deflator = (Nominal / Real) * 100
-gdp_deflator = (nominal_total / real_total) * 100
+gdp_deflator = matrix.series("deflator", TOTAL).values
 
-# Year-over-Year Inflation = % change in GDP deflator
-inflation = np.diff(gdp_deflator) / gdp_deflator[:-1] * 100
+# Year-over-Year Inflation = % change in GDP deflator (none for the first year)
+inflation = matrix.series("inflation", TOTAL).values[1:]
 
 # Years for inflation (one less than total)
 inflation_years = years_actual[1:]
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+pipeline_runner.py
+Runs the CDC pipelines (clean -> align -> derive -> export -> plot) as one dependency graph.
+
+Every stage has a key: a hash of its code, its parameters and its inputs,
+where the inputs of the clean stages are the raw CSVs' contents and those of
+later stages are the hashes of their upstream results. Stage results are
+pickled to CACHE_DIR under that key and stages that write files record the
+key they last ran with, so a run only executes the stages whose inputs or
+code changed; on unchanged data it just hashes the CSVs and exits. Because
+keys follow results rather than upstream keys, a change that leaves a
+result unchanged (say, a refactor of utils.py) stops there.
+Within a plot stage that does run, graphs.py still skips each figure whose
+data and styling did not change.
+
+    python pipeline_runner.py [target ...] [--force] [--mode final|preview|svg|pdf]
+
+Targets default to every export and plot stage.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from bea_dataset import load_bea_table
+from utils import align_dataframes, compute_derived_metrics, ensure_output_dir
+# graphs and render_service (seaborn, matplotlib) are imported by the plot stages that
+# run, so a run with nothing to plot never loads them
+import plot_modes
+
+# Candidate files for each input; the first one present is used
+INPUT_FILES = {
+    "compensation": ["Space Economy Compensation by Industry.csv"],
+    "employment": ["Space Economy Employment by Industry.csv"],
+    "gross_output": ["Real Gross Output by Industry.csv", "Space Economy Real Gross Output by Industry.csv"],
+    "value_added": ["Real Value Added by Industry.csv", "Space Economy Real Value Added by Industry.csv"],
+}
+
+CACHE_DIR = ".pipeline_cache"
+FULL_DIR = "outputs/full"
+TOP_DIR = "outputs/top8"
+TOP_N = 8
+
+
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    fn is called with the results of deps, in order, and params as keyword
+    arguments. Stages with outputs are sinks: they write those files and
+    return nothing; the others return a value that is cached. files are raw
+    inputs hashed into the key, and code lists source files (besides fn
+    itself) whose changes should re-run it.
+    """
+
+    def __init__(self, name: str, fn: Callable, deps: Sequence[str] = (), params: Optional[dict] = None,
+                 files: Sequence[str] = (), outputs: Sequence[str] = (), code: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.files = list(files)
+        self.outputs = list(outputs)
+        self.code = list(code)
+
+
+class PipelineRunner:
+    """Executes Stages in dependency order, reusing cached results whose key is unchanged."""
+
+    def __init__(self, stages: List[Stage], cache_dir: str = CACHE_DIR):
+        self.stages = {s.name: s for s in stages}
+        self.cache_dir = cache_dir
+        self.order = self._topological_order()
+        self._keys: Dict[str, str] = {}
+        self._values: Dict[str, object] = {}
+        self.status: Dict[str, str] = {}
+        ensure_output_dir(cache_dir)
+        self._stamps_path = os.path.join(cache_dir, "stamps.json")
+        try:
+            with open(self._stamps_path) as f:
+                stamps = json.load(f)
+        except (OSError, ValueError):
+            stamps = {}
+        # Key each sink last ran with, and (key, result hash) of each cached stage
+        self._stamps = stamps.get("sinks", {})
+        self._digests = stamps.get("results", {})
+
+    def run(self, targets: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+        """
+        Brings targets (default: every sink) up to date.
+
+        Returns a dict of stage -> 'ran', 'cached' (result loaded from the cache)
+        or 'up to date' (sink whose outputs already match its key), for every
+        stage that had to be consulted.
+        """
+        if targets is None:
+            targets = [name for name in self.order if self.stages[name].outputs]
+        unknown = [t for t in targets if t not in self.stages]
+        if unknown:
+            raise SystemExit(f"ERROR: unknown stage(s) {unknown}. Choose from {self.order}.")
+        self.status = {}
+        for name in self.order:
+            if name in targets:
+                self._sink(name, force) if self.stages[name].outputs else self._value(name, force)
+        # Plot stages only queue their figures; finish them before recording the stages as done
+        render_service = sys.modules.get("render_service")
+        if render_service is not None:
+            start = time.perf_counter()
+            rendered = render_service.pool.wait()
+            if rendered:
+                print(f"rendered {len(rendered)} figure(s) in {time.perf_counter() - start:.2f}s "
+                      f"on {render_service.pool.max_workers} worker(s)")
+        with open(self._stamps_path, "w") as f:
+            json.dump({"sinks": self._stamps, "results": self._digests}, f, indent=1)
+        return self.status
+
+    def key(self, name: str) -> str:
+        """Hash of a stage's code, parameters, input files and upstream results."""
+        if name not in self._keys:
+            stage = self.stages[name]
+            digest = hashlib.sha256(name.encode("utf-8"))
+            digest.update(inspect.getsource(stage.fn).encode("utf-8"))
+            digest.update(repr(sorted(stage.params.items())).encode("utf-8"))
+            for path in stage.code + stage.files:
+                digest.update(path.encode("utf-8"))
+                digest.update(_file_hash(path).encode("utf-8"))
+            for dep in stage.deps:
+                digest.update(self._digest(dep).encode("utf-8"))
+            self._keys[name] = digest.hexdigest()[:16]
+        return self._keys[name]
+
+    def _digest(self, name: str) -> str:
+        # Hash of a stage's result; known without loading it if the stage's key is unchanged
+        key, digest = self._digests.get(name, (None, None))
+        if key != self.key(name) or not os.path.exists(self._cache_path(name)):
+            self._value(name)
+            key, digest = self._digests[name]
+        return digest
+
+    def _cache_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{self.key(name)}.pkl")
+
+    def _value(self, name: str, force: bool = False):
+        if name in self._values:
+            return self._values[name]
+        path = self._cache_path(name)
+        if not force and os.path.exists(path):
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            self.status[name] = "cached"
+        else:
+            value = self._execute(name, force)
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._prune(name, path)
+            self._digests[name] = (self.key(name), hashlib.sha256(data).hexdigest()[:16])
+        self._values[name] = value
+        return value
+
+    def _sink(self, name: str, force: bool):
+        stage = self.stages[name]
+        key = self.key(name)
+        if not force and self._stamps.get(name) == key and all(os.path.exists(p) for p in stage.outputs):
+            self.status[name] = "up to date"
+            return
+        self._execute(name, force)
+        self._stamps[name] = key
+
+    def _execute(self, name: str, force: bool):
+        stage = self.stages[name]
+        args = [self._value(dep, force) for dep in stage.deps]
+        start = time.perf_counter()
+        value = stage.fn(*args, **stage.params)
+        self.status[name] = "ran"
+        print(f"{name}: ran in {time.perf_counter() - start:.2f}s")
+        return value
+
+    def _prune(self, name: str, keep: str):
+        # Only the newest result of each stage is kept
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            if filename.startswith(f"{name}-") and filename.endswith(".pkl") and path != keep:
+                os.remove(path)
+
+    def _topological_order(self) -> List[str]:
+        order, visiting = [], set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through '{name}'.")
+            if name not in self.stages:
+                raise ValueError(f"Unknown dependency '{name}'.")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+
+_hashes: Dict[str, str] = {}
+
+
+def _file_hash(path: str) -> str:
+    if path not in _hashes:
+        with open(path, "rb") as f:
+            _hashes[path] = hashlib.sha256(f.read()).hexdigest()
+    return _hashes[path]
+
+
+def resolve_inputs() -> Dict[str, str]:
+    """Picks the first existing candidate file for each input; missing inputs are left out."""
+    found = {}
+    for key, candidates in INPUT_FILES.items():
+        for fname in candidates:
+            if Path(fname).exists():
+                found[key] = fname
+                break
+    if "compensation" not in found or "employment" not in found or (("gross_output" not in found) and ("value_added" not in found)):
+        raise SystemExit("ERROR: Need compensation, employment, and either gross_output or value_added files present.")
+    return found
+
+
+# ----- Stage functions -----
+
+def align_stage(compensation, employment, output):
+    subset = {"compensation": compensation, "employment": employment, "output": output}
+    return align_dataframes(subset)
+
+
+def derive_stage(aligned):
+    subset_aligned, _ = aligned
+    return compute_derived_metrics(subset_aligned["compensation"],
+                                   subset_aligned["employment"],
+                                   subset_aligned["output"])
+
+
+def top_industries_stage(aligned):
+    subset_aligned, _ = aligned
+    mean_output = subset_aligned["output"].mean(axis=1).sort_values(ascending=False)
+    top_inds = mean_output.index[:TOP_N].tolist()
+    print("Top industries selected:", top_inds)
+    return top_inds
+
+
+def export_full_stage(aligned, derived, output_key):
+    subset_aligned, common_years = aligned
+    ensure_output_dir(FULL_DIR)
+    for k, df in subset_aligned.items():
+        df.to_csv(os.path.join(FULL_DIR, f"{output_key if k == 'output' else k}_clean.csv"))
+    for name, filename in FULL_EXPORTS.items():
+        derived[name].to_csv(os.path.join(FULL_DIR, filename))
+
+    # Summary CSV (mean/median across industries by year)
+    summary = pd.DataFrame(index=common_years)
+    summary["mean_pct_emp_change"] = derived["pct_emp"].mean(axis=0)
+    summary["mean_pct_output_change"] = derived["pct_output"].mean(axis=0)
+    summary["mean_labor_hoarding_diff"] = derived["labor_hoarding_diff"].mean(axis=0)
+    summary["median_labor_hoarding_diff"] = derived["labor_hoarding_diff"].median(axis=0)
+    summary["mean_wage_inflation_pct"] = derived["wage_inflation"].mean(axis=0)
+    summary.to_csv(os.path.join(FULL_DIR, "summary_by_year.csv"))
+
+
+def export_top_stage(derived, top_inds):
+    ensure_output_dir(TOP_DIR)
+    for name, df in derived.items():
+        df.loc[top_inds].to_csv(os.path.join(TOP_DIR, f"{name}_top{TOP_N}.csv"))
+
+
+def plot_full_stage(derived, mode):
+    import render_service
+    from render_service import PlotSpec
+    from pipeline_full import save_line_plot
+    for name, title, ylabel in FULL_PLOTS:
+        render_service.pool.submit(PlotSpec(save_line_plot, os.path.join(FULL_DIR, f"{name}_all.png"),
+                                            args=(derived[name],),
+                                            kwargs={"title": title, "ylabel": ylabel, "mode": mode}))
+
+
+def plot_top_stage(derived, top_inds, mode):
+    import render_service
+    from render_service import PlotSpec
+    from pipeline_top8 import save_line_plot
+    for name, title, ylabel in TOP_PLOTS:
+        render_service.pool.submit(PlotSpec(save_line_plot, os.path.join(TOP_DIR, f"{name}_top{TOP_N}.png"),
+                                            args=(derived[name].loc[top_inds],),
+                                            kwargs={"title": title, "ylabel": ylabel, "mode": mode}))
+
+
+def plot_multi_stage(derived, mode):
+    import render_service
+    from render_service import PlotSpec
+    from pipeline_multi import abbreviate_industry, plot_multi_metric, OUT_FILE
+    metrics = []
+    for name in ("labor_hoarding_diff", "labor_hoarding_ratio", "wage_inflation"):
+        df = derived[name].copy()
+        df.index = [abbreviate_industry(i) for i in df.index]
+        metrics.append(df)
+    titles = ["Labor Hoarding (%ΔEmployment - %ΔOutput)",
+              "Labor Hoarding Ratio ((1+ΔEmp)/(1+ΔOut)-1)",
+              "Wage Inflation (YoY % change in avg compensation per employee)"]
+    ylabels = ["Percentage points", "Percent", "Percent"]
+    render_service.pool.submit(PlotSpec(plot_multi_metric, OUT_FILE, args=(metrics, titles, ylabels),
+                                        kwargs={"mode": mode}, path_arg="out_file"))
+
+
+# Derived metric -> CSV name in outputs/full
+FULL_EXPORTS = {
+    "labor_hoarding_diff": "labor_hoarding_diff_percent.csv",
+    "labor_hoarding_ratio": "labor_hoarding_ratio_percent.csv",
+    "wage_inflation": "wage_inflation_percent.csv",
+    "avg_comp": "avg_compensation_per_employee.csv",
+    "pct_emp": "pct_employment_change.csv",
+    "pct_output": "pct_output_change.csv",
+}
+
+# (metric, title, y label) of the line plots drawn for all and for the top industries
+FULL_PLOTS = [
+    ("labor_hoarding_diff", "Labor Hoarding (%ΔEmployment - %ΔOutput) — All Industries", "Percentage points"),
+    ("labor_hoarding_ratio", "Labor Hoarding Ratio ((1+ΔEmp)/(1+ΔOut)-1) — All Industries", "Percent"),
+    ("wage_inflation", "Wage Inflation (YoY % change in avg compensation per employee) — All Industries", "Percent"),
+]
+TOP_PLOTS = [
+    ("labor_hoarding_diff", f"Labor Hoarding (%ΔEmp - %ΔOut) — Top {TOP_N} Industries", "Percentage points"),
+    ("labor_hoarding_ratio", f"Labor Hoarding Ratio — Top {TOP_N} Industries", "Percent"),
+    ("wage_inflation", f"Wage Inflation (YoY % avg comp) — Top {TOP_N} Industries", "Percent"),
+]
+
+
+def build_pipeline(mode: Optional[str] = None) -> List[Stage]:
+    """
+    Builds the stage graph for the input files present in the working directory.
+    mode is the graphs.py output mode of the plots (default: plot_modes.MODE).
+    """
+    mode = mode or plot_modes.MODE
+    inputs = resolve_inputs()
+    output_key = "gross_output" if "gross_output" in inputs else "value_added"
+    stages = [
+        Stage(f"clean_{key}", load_bea_table, params={"path": fname}, files=[fname],
+              code=["utils.py", "bea_dataset.py"])
+        for key, fname in inputs.items() if key in ("compensation", "employment", output_key)
+    ]
+    derived_names = list(FULL_EXPORTS)
+    stages += [
+        Stage("align", align_stage, deps=["clean_compensation", "clean_employment", f"clean_{output_key}"],
+              code=["utils.py"]),
+        Stage("derive", derive_stage, deps=["align"], code=["utils.py", "metrics_engine.py"]),
+        Stage("top_industries", top_industries_stage, deps=["align"]),
+        Stage("export_full", export_full_stage, deps=["align", "derive"], params={"output_key": output_key},
+              outputs=[os.path.join(FULL_DIR, f"{k}_clean.csv") for k in ("compensation", "employment", output_key)]
+              + [os.path.join(FULL_DIR, f) for f in FULL_EXPORTS.values()]
+              + [os.path.join(FULL_DIR, "summary_by_year.csv")]),
+        Stage("export_top8", export_top_stage, deps=["derive", "top_industries"],
+              outputs=[os.path.join(TOP_DIR, f"{name}_top{TOP_N}.csv") for name in derived_names]),
+        Stage("plot_full", plot_full_stage, deps=["derive"], params={"mode": mode},
+              code=["pipeline_full.py", "graphs.py", "plot_modes.py", "render_service.py"],
+              outputs=[plot_modes.output_path(os.path.join(FULL_DIR, f"{name}_all.png"), mode)
+                       for name, _, _ in FULL_PLOTS]),
+        Stage("plot_top8", plot_top_stage, deps=["derive", "top_industries"], params={"mode": mode},
+              code=["pipeline_top8.py", "graphs.py", "plot_modes.py", "render_service.py"],
+              outputs=[plot_modes.output_path(os.path.join(TOP_DIR, f"{name}_top{TOP_N}.png"), mode)
+                       for name, _, _ in TOP_PLOTS]),
+        Stage("plot_multi", plot_multi_stage, deps=["derive"], params={"mode": mode},
+              code=["pipeline_multi.py", "graphs.py", "plot_modes.py", "render_service.py"],
+              outputs=[plot_modes.output_path(os.path.join(FULL_DIR, "multi_metric_all_industries.png"), mode)]),
+    ]
+    return stages
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the CDC pipelines incrementally.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all exports and plots).")
+    parser.add_argument("--force", action="store_true", help="Re-run every needed stage, ignoring the cache.")
+    parser.add_argument("--mode", choices=list(plot_modes.MODES), default=plot_modes.MODE,
+                        help="Plot output: final 300 dpi PNGs, low-dpi previews, or SVG/PDF (default: $PLOT_MODE or final).")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    runner = PipelineRunner(build_pipeline(args.mode))
+    try:
+        status = runner.run(args.targets or None, force=args.force)
+    finally:
+        if "render_service" in sys.modules:
+            sys.modules["render_service"].pool.close()
+    ran = [name for name, state in status.items() if state == "ran"]
+    print(f"Pipeline complete in {time.perf_counter() - start:.2f}s; "
+          f"ran {len(ran)} stage(s){': ' + ', '.join(ran) if ran else ''}.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,38 +1,15 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-import numpy as np
+from deflator import TOTAL, DeflatorMatrix
 
-# --- File names ---
-real_file = "Space Economy Real Value Added by Industry.csv"
-nominal_file = "Space Economy Value Added by Industry.csv"
+# --- Nominal and real value added of every industry, matched by label (cached by deflator.py) ---
+matrix = DeflatorMatrix.load()
 
-# --- Read and clean CSV ---
-def read_csv_clean(fname):
-    df = pd.read_csv(fname, header=None)
-    df = df.applymap(lambda x: str(x).strip() if isinstance(x, str) else x)
-    numeric_cols = [col for col in df.columns if pd.to_numeric(df[col], errors='coerce').notna().any()]
-    first_numeric_col = numeric_cols[0]
-    for col in df.columns[first_numeric_col:]:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ""), errors='coerce')
-    return df, first_numeric_col
+# --- Total: the addendum line that leaves out satellite TV/radio and education ---
+real_total = matrix.series("real", TOTAL).values
+nominal_total = matrix.series("nominal", TOTAL).values
 
-# --- Read datasets ---
-real_df, real_start_col = read_csv_clean(real_file)
-nominal_df, nominal_start_col = read_csv_clean(nominal_file)
-
-# --- Total row index: 11th from bottom ---
-total_row_idx_real = len(real_df) - 11
-total_row_idx_nominal = len(nominal_df) - 11
-
-# --- Extract totals: ignore any initial non-numeric entries ---
-real_total = real_df.iloc[total_row_idx_real, real_start_col:].dropna().values
-real_total = real_total[-12:]  # take last 12 values (2012-2023)
-
-nominal_total = nominal_df.iloc[total_row_idx_nominal, nominal_start_col:].dropna().values
-nominal_total = nominal_total[-12:]  # last 12 values
-
-# --- X-axis for actual data (2012-2023) ---
-years_actual = list(range(2012, 2024))  # 12 years
+# --- X-axis for actual data (every year in the tables) ---
+years_actual = matrix.years
 
 # --- Function to plot Real/Nominal GDP ---
 def plot_value_added(real, nominal, years):
@@ -0,0 +1,20 @@
+# plot_modes.py
+"""Plot output modes and where each writes its files; no plotting libraries, so the pipeline can plan plots cheaply."""
+
+import os
+
+MODES = {
+    "final": {"format": "png", "dpi": 300, "suffix": ".png"},
+    "preview": {"format": "png", "dpi": 72, "suffix": ".preview.png"},
+    "svg": {"format": "svg", "dpi": 300, "suffix": ".svg"},
+    "pdf": {"format": "pdf", "dpi": 300, "suffix": ".pdf"},
+}
+MODE = os.environ.get("PLOT_MODE", "final")
+
+
+def output_path(out_path: str, mode: str = None) -> str:
+    """Where a plot meant for out_path is written in mode (default: MODE)."""
+    mode = mode or MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown plot mode '{mode}'. Choose from {list(MODES)}.")
+    return os.path.splitext(out_path)[0] + MODES[mode]["suffix"]
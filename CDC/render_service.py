@@ -0,0 +1,118 @@
+# render_service.py
+"""Renders figures from plot specs across a pool of worker processes, with the Agg backend."""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence
+import os
+
+# Theme every figure starts from unless its spec says otherwise; the pipelines' sns.set(style="whitegrid")
+DEFAULT_STYLE = {"style": "whitegrid"}
+
+
+class PlotSpec:
+    """
+    One figure to render: fn(*args, **kwargs) draws and saves it to out_path.
+
+    fn must be a module-level function (so it can be sent to a worker) and
+    receives out_path as the keyword path_arg. Before fn runs, matplotlib's
+    rc settings are reset and seaborn's theme is set from style, so a figure
+    looks the same whichever worker draws it and whatever that worker drew
+    before.
+    """
+
+    def __init__(self, fn: Callable, out_path: str, args: Sequence = (), kwargs: Optional[dict] = None,
+                 style: Optional[dict] = None, path_arg: str = "out_path"):
+        self.fn = fn
+        self.out_path = out_path
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.style = dict(DEFAULT_STYLE if style is None else style)
+        self.path_arg = path_arg
+
+
+def _use_agg():
+    import matplotlib
+    # Nothing is shown, and Agg needs no display and no GUI event loop
+    matplotlib.use("Agg", force=True)
+
+
+def render(spec: PlotSpec) -> str:
+    """Render one spec in this process; returns its out_path."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    _use_agg()
+    matplotlib.rcdefaults()
+    sns.set_theme(**spec.style)
+    os.makedirs(os.path.dirname(spec.out_path) or ".", exist_ok=True)
+    try:
+        spec.fn(*spec.args, **spec.kwargs, **{spec.path_arg: spec.out_path})
+    finally:
+        plt.close("all")
+    return spec.out_path
+
+
+class RenderPool:
+    """
+    Process pool that renders PlotSpecs as they are submitted.
+
+    Workers are started on the first submit, up to max_workers (default: the
+    number of CPUs), and reused until close(). With a single worker the specs
+    are rendered in this process when wait() is called, which skips the cost
+    of starting and feeding a pool that could not run anything in parallel.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Future] = []
+        self._serial: List[PlotSpec] = []
+
+    def submit(self, spec: PlotSpec):
+        """Queue a spec; it may render in the background until wait()."""
+        if self.max_workers <= 1:
+            self._serial.append(spec)
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers, initializer=_use_agg)
+        self._pending.append(self._executor.submit(render, spec))
+
+    def wait(self) -> List[str]:
+        """
+        Block until every submitted spec is rendered; returns their out_paths in submission order.
+        Re-raises the first error a render hit, after the others have finished.
+        """
+        pending, self._pending = self._pending, []
+        serial, self._serial = self._serial, []
+        paths, error = [], None
+        for future in pending:
+            try:
+                paths.append(future.result())
+            except Exception as e:
+                error = error or e
+        for spec in serial:
+            paths.append(render(spec))
+        if error is not None:
+            raise error
+        return paths
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# Shared by the pipeline stages, so the figures of different stages render side by side
+pool = RenderPool(int(os.environ.get("RENDER_WORKERS", 0)) or None)
+
+
+def render_all(specs: Sequence[PlotSpec], max_workers: Optional[int] = None) -> List[str]:
+    """Render specs across a pool of max_workers processes and wait for all of them."""
+    workers = RenderPool(max_workers)
+    try:
+        for spec in specs:
+            workers.submit(spec)
+        return workers.wait()
+    finally:
+        workers.close()
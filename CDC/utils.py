@@ -1,11 +1,16 @@
 # utils.py
 """Helpers for cleaning the four CSVs and computing derived labor/wage metrics."""
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
+import io
+import re
 import pandas as pd
 import numpy as np
 import os
 
+from metrics_engine import compute_metrics
+
 def read_and_clean_csv(path: str, skiprows: int = 5) -> pd.DataFrame:
     """
     Read CSV according to the spreadsheet layout you described:
@@ -30,6 +35,58 @@ def read_and_clean_csv(path: str, skiprows: int = 5) -> pd.DataFrame:
     df = df.dropna(how="all")
     return df
 
+# Values BEA prints instead of a number: suppressed ("(D)"), not available, or not applicable.
+# "â€¦" is the "…" placeholder read with the wrong encoding, as found in some exports.
+BEA_MISSING_MARKERS = ["…", "â€¦", "...", "..", ".", "(D)", "(NA)", "(S)", "(X)", "---", "NA", "na", ""]
+
+_BEA_HEADER = re.compile(r"^[^,\n]*,[^,\n]*,\s*\d{4}\s*(,|$)", re.MULTILINE)
+
+
+def read_bea_table(path: str, drop_empty: bool = True, addendum: bool = False) -> pd.DataFrame:
+    """
+    Read a raw BEA table in one parsing pass, with the same layout read_and_clean_csv returns
+    (index 'Industry', one float64 column per year):
+    - the title rows are skipped by locating the header row (' , ,2012,2013,...')
+    - the 'Addendum:' block (unless addendum=True) and the footnotes after the table are left out
+    - thousands separators ("182,757") are parsed as numbers, not turned into NaN
+    - BEA_MISSING_MARKERS ("…", "(D)", ...) become NaN
+    Industry labels are kept verbatim, indentation and footnote digits included.
+    drop_empty drops industries with no value in any year, like read_and_clean_csv.
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        text = f.read()
+    header = _BEA_HEADER.search(text)
+    if header is None:
+        raise ValueError(f"{path}: no header row with years found.")
+    end = -1 if addendum else text.find("\n,Addendum:", header.start())
+    body = text[header.start():end if end != -1 else len(text)]
+
+    first_line = body[:body.find("\n")] if "\n" in body else body
+    years = [c.strip() for c in first_line.split(",")[2:]]
+    dtypes = {"Line": str, "Industry": str}
+    dtypes.update({year: np.float64 for year in years})
+    df = pd.read_csv(io.StringIO(body), header=0, names=list(dtypes), dtype=dtypes, thousands=",",
+                     na_values=BEA_MISSING_MARKERS, keep_default_na=False, engine="c")
+
+    # Table rows carry a line number; footnotes and blank rows do not
+    df = df[df["Line"].str.strip().str.isdigit().fillna(False)]
+    df = df.drop(columns="Line").set_index("Industry")
+    if drop_empty:
+        df = df.dropna(how="all")
+    return df
+
+
+def read_bea_tables(paths: Dict[str, str], max_workers: int = None, **kwargs) -> Dict[str, pd.DataFrame]:
+    """
+    Read several BEA tables concurrently with read_bea_table; pandas' C parser releases the GIL,
+    so threads overlap the parsing as well as the file reads.
+    Returns {key: DataFrame} for {key: path}.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(paths), os.cpu_count() or 1) or 1) as executor:
+        futures = {key: executor.submit(read_bea_table, path, **kwargs) for key, path in paths.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+
 def align_dataframes(dfs: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
     """
     Intersect industries and years across provided dataframes and return the aligned dict + common_years list.
@@ -66,33 +123,9 @@ def compute_derived_metrics(comp: pd.DataFrame, emp: pd.DataFrame, output: pd.Da
       - labor_hoarding_diff: pct_emp - pct_output (percentage point diff)
       - labor_hoarding_ratio: ((1+Δemp) / (1+Δout) -1) * 100 (percent)
     Returns a dict with these DataFrames (industries x years; note first year will be NaN for percent-change metrics).
+    They are computed by metrics_engine.ENGINE, where further metrics can be registered.
     """
-    comp = comp.copy()
-    emp = emp.copy()
-    output = output.copy()
-
-    # Average compensation per employee
-    avg_comp = comp.divide(emp).replace([np.inf, -np.inf], np.nan)
-
-    # YoY percent changes
-    wage_inflation = avg_comp.pct_change(axis=1) * 100  # percent
-    pct_emp = emp.pct_change(axis=1) * 100
-    pct_output = output.pct_change(axis=1) * 100
-
-    # Labor hoarding measures
-    labor_hoarding_diff = pct_emp - pct_output  # percentage points
-    emp_frac_change = pct_emp / 100.0
-    output_frac_change = pct_output / 100.0
-    labor_hoarding_ratio = ((1 + emp_frac_change) / (1 + output_frac_change) - 1) * 100.0
-
-    return {
-        "avg_comp": avg_comp,
-        "wage_inflation": wage_inflation,
-        "pct_emp": pct_emp,
-        "pct_output": pct_output,
-        "labor_hoarding_diff": labor_hoarding_diff,
-        "labor_hoarding_ratio": labor_hoarding_ratio
-    }
+    return compute_metrics(comp, emp, output)
 
 def ensure_output_dir(path: str):
     os.makedirs(path, exist_ok=True)
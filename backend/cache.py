@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional on-disk store.
+
+    Keys are tuples whose first element is a dataset version (a content hash).
+    Entries live in memory up to max_entries (and, when max_bytes is set, up to
+    that many bytes as measured by len(value)); when disk_dir is set every entry
+    is also pickled there so a restarted worker can load it instead of
+    recomputing it. Disk files are prefixed with their dataset version, which
+    lets track_version() drop everything computed from stale data.
+    """
+
+    def __init__(self, name, max_entries=128, disk_dir=None, max_bytes=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._versions = self._read_versions()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+        self._dump(key, value)
+
+    def track_version(self, source, version):
+        """
+        Records the current version of a data source, dropping the cached
+        entries of the version it replaces.
+        """
+        with self._lock:
+            previous = self._versions.get(source)
+            if previous == version:
+                return
+            self._versions[source] = version
+            if previous is not None:
+                for key in [k for k in self._entries if k[0] == previous]:
+                    self._discard(key)
+        if self.disk_dir:
+            if previous is not None:
+                for filename in os.listdir(self.disk_dir):
+                    if filename.startswith(f"{previous}-"):
+                        os.remove(os.path.join(self.disk_dir, filename))
+            self._write_versions()
+
+    def version(self, source):
+        """
+        Returns the version last tracked for a data source, or None.
+        """
+        with self._lock:
+            return self._versions.get(source)
+
+    def copy_version(self, previous, version, keep):
+        """
+        Copies the entries of one dataset version to another, for every key whose
+        remaining parts satisfy keep(key[1:]). Used to carry results that did not
+        depend on the changed data over to the new version.
+        """
+        with self._lock:
+            copies = {key: value for key, value in self._entries.items()
+                      if key[0] == previous and keep(key[1:])}
+        if self.disk_dir:
+            for filename in os.listdir(self.disk_dir):
+                if not filename.startswith(f"{previous}-"):
+                    continue
+                try:
+                    with open(os.path.join(self.disk_dir, filename), 'rb') as f:
+                        key, value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                    continue
+                if keep(key[1:]):
+                    copies.setdefault(key, value)
+        for key, value in copies.items():
+            self.put((version,) + key[1:], value)
+        return len(copies)
+
+    def prune(self, prefix, keep):
+        """
+        Drops the entries whose key starts with prefix and whose remaining parts
+        fail keep(key[1:]), from memory and disk. Used for caches keyed by a data
+        source rather than a version, which track_version() cannot clean up.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == prefix and not keep(key[1:])]
+            for key in stale:
+                self._discard(key)
+        dropped = set(stale)
+        if self.disk_dir:
+            for filename in os.listdir(self.disk_dir):
+                if not filename.startswith(f"{prefix}-"):
+                    continue
+                path = os.path.join(self.disk_dir, filename)
+                try:
+                    with open(path, 'rb') as f:
+                        key, _ = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                    continue
+                if key[0] == prefix and not keep(key[1:]):
+                    os.remove(path)
+                    dropped.add(key)
+        return len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, value):
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = value
+        if self.max_bytes is not None:
+            self.size_bytes += len(value)
+        while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.size_bytes > self.max_bytes and len(self._entries) > 1):
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        value = self._entries.pop(key)
+        if self.max_bytes is not None:
+            self.size_bytes -= len(value)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{key[0]}-{digest}.pkl")
+
+    def _load(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        return value if stored_key == key else None
+
+    def _dump(self, key, value):
+        if not self.disk_dir:
+            return
+        # Write to a temp file first so concurrent readers never see a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_versions(self):
+        try:
+            with open(os.path.join(self.disk_dir, 'versions.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_versions(self):
+        with open(os.path.join(self.disk_dir, 'versions.json'), 'w') as f:
+            json.dump(self._versions, f)
@@ -0,0 +1,67 @@
+"""
+Measures backend cold start in fresh interpreters.
+
+    python coldstart.py [--runs 5] [--budget 1.0]
+
+Each run starts a new Python process without a disk cache and times, from the
+start of the process, how long it takes to import the app, answer /health,
+answer /getColumns (the datasets are loaded) and answer a data-only forecast
+(the forecasting stack is loaded and one model is fitted). Medians are
+printed; with --budget the script exits non-zero when the median time to the
+first /health answer exceeds that many seconds, so it can gate regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+from urllib.parse import quote
+start = time.perf_counter()
+import main
+client = main.app.test_client()
+timings = {"import": time.perf_counter() - start}
+for name, url in (("health", "/health"), ("columns", "/getColumns"),
+                  ("forecast", "/forecast?format=data&column=" + quote("Space economy"))):
+    assert client.get(url).status_code == 200, url
+    timings[name] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+STAGES = ("import", "health", "columns", "forecast")
+
+
+def measure(runs=5):
+    """
+    Runs the cold-start probe runs times.
+
+    Returns:
+        dict: Median seconds from process start to each stage.
+    """
+    env = {k: v for k, v in os.environ.items() if k != 'FORECAST_CACHE_DIR'}
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    backend = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=backend, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {stage: statistics.median(s[stage] for s in samples) for stage in STAGES}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time backend cold start.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=None,
+                        help="Fail when the median time to the first /health answer exceeds this many seconds.")
+    args = parser.parse_args()
+
+    medians = measure(args.runs)
+    for stage in STAGES:
+        print(f"{stage:<10}{medians[stage]:8.3f} s")
+    if args.budget is not None and medians["health"] > args.budget:
+        print(f"Cold start to /health took {medians['health']:.3f} s, over the {args.budget:.3f} s budget.")
+        sys.exit(1)
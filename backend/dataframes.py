@@ -1,12 +1,25 @@
 import pandas as pd
+from registry import SOURCES, registry
+
+# The tables now live in registry.registry; this module keeps the old
+# `dataframes.real_output_df`-style access working on top of it.
 
 # Helper function to clean CSVs
 def load_and_clean_csv(filepath, skiprows=0):
     df_raw = pd.read_csv(filepath, skiprows=skiprows)
     return df_raw
 
-# Load individual CSVs
-employment_df = load_and_clean_csv('../data/Compensation_By_Industry.csv')
-compensation_df = load_and_clean_csv('../data/Employment_By_Industry.csv')
-real_output_df = load_and_clean_csv('../data/Real_Gross_Output_By_Industry.csv')
-value_added_df = load_and_clean_csv('../data/Real_Value_Added_By_Industry.csv')
+def reload_if_changed():
+    """
+    Re-reads every source CSV whose contents changed since it was loaded.
+
+    Returns:
+        list: Names of the DataFrames that were reloaded.
+    """
+    return registry.refresh(list(SOURCES))
+
+def __getattr__(name):
+    # employment_df, compensation_df, real_output_df and value_added_df, always the current version
+    if name in SOURCES:
+        return registry.get(name).frame
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -0,0 +1,370 @@
+import math
+import sys
+import numpy as np
+import pandas as pd
+
+
+class ForecastEngine:
+    """
+    Fits ARIMA(p,d,q) models. fit() returns a results object with
+    forecast(steps) -> pd.Series, aic, bic and mle_retvals, like statsmodels'
+    ARIMAResults, so callers can swap engines freely.
+    """
+
+    name = None
+
+    def supports(self, arima_order):
+        """
+        Whether fit() reproduces the reference (statsmodels) forecasts for this order.
+        """
+        return True
+
+    def fit(self, series, arima_order):
+        raise NotImplementedError
+
+
+class StatsmodelsEngine(ForecastEngine):
+    """
+    Exact maximum-likelihood ARIMA through statsmodels' state-space model.
+    """
+
+    name = 'statsmodels'
+
+    def fit(self, series, arima_order):
+        # Imported here so processes that only use the NumPy engine never pay for statsmodels
+        from statsmodels.tsa.arima.model import ARIMA
+        return ARIMA(series, order=arima_order).fit()
+
+
+def _integrated_orders(max_d, max_terms):
+    return frozenset((p, d, q) for d in range(1, max_d + 1) for p in range(max_terms - d + 1)
+                     for q in range(max_terms - d - p + 1))
+
+
+class NumpyEngine(ForecastEngine):
+    """
+    Exact maximum-likelihood ARIMA with a NumPy Kalman filter.
+
+    The estimator is statsmodels' ARIMA, re-implemented step by step so the two
+    agree: the same state-space form on the undifferenced series (the first d
+    states approximately diffuse with variance 1e6, the ARMA states at their
+    stationary covariance, the first d observations left out of the
+    likelihood), the same conditional least-squares start values, the same
+    transforms that keep the AR part stationary and the MA part invertible, and
+    the same L-BFGS-B settings. What is faster is the filter: each gradient
+    filters every finite-difference point in one batch instead of one call per
+    parameter, and statsmodels itself is never imported.
+
+    Only d of 1 or 2 is fitted (with d == 0 statsmodels also estimates a constant).
+    With more than MAX_TERMS AR, MA and differencing terms (each difference
+    costs an observation), statsmodels' own estimates on BEA's dozen yearly
+    values are not reproducible: for the default (6,1,1) it ends on the unit
+    circle with a degenerate likelihood, and changing only its optimizer moves
+    the median forecast by the series' whole level. Those orders are rejected
+    rather than fitted to a different answer.
+    """
+
+    name = 'numpy'
+
+    MAX_TERMS = 5
+
+    # Every order fitted: d of 1 or 2 (the most requests may ask for) and p + d + q of at most MAX_TERMS
+    ORDERS = _integrated_orders(max_d=2, max_terms=MAX_TERMS)
+
+    def supports(self, arima_order):
+        return tuple(arima_order) in self.ORDERS
+
+    def fit(self, series, arima_order):
+        if not self.supports(arima_order):
+            raise ValueError(f"The numpy engine cannot fit ARIMA{tuple(arima_order)} faithfully; it fits d of 1 or 2 "
+                             f"and p + d + q of at most {self.MAX_TERMS}. Use the statsmodels engine.")
+        # Imported here so importing the engines stays cheap
+        from scipy.optimize import fmin_l_bfgs_b
+
+        p, d, q = arima_order
+        values = np.asarray(series, dtype=float)
+        if len(values) <= d:
+            raise ValueError(f"Too few observations to fit ARIMA{tuple(arima_order)}.")
+
+        def objective(x):
+            # Mean negative log-likelihood and its forward-difference gradient, as scipy's approx_grad computes them
+            step = np.where((x + _GRADIENT_STEP) - x == 0,
+                            _MIN_STEP * np.where(x >= 0, 1.0, -1.0) * np.maximum(1.0, np.abs(x)), _GRADIENT_STEP)
+            points = x + np.diag(step)
+            f = -_loglike(values, _constrain(np.vstack([x, points]), p, q), p, d, q)[0] / len(values)
+            # Where the filter fails at x too, the gradient is NaN, as scipy's would be
+            with np.errstate(invalid='ignore'):
+                return f[0], (f[1:] - f[0]) / (np.diagonal(points) - x)
+
+        start = _unconstrain(_start_params(np.diff(values, n=d), p, q)[None], p, q)[0]
+        x, _, info = fmin_l_bfgs_b(objective, start, maxiter=50)
+        params = _constrain(x[None], p, q)
+        llf, state, transition = _loglike(values, params, p, d, q)
+        return NumpyARIMAResults(series, arima_order, params[0], float(llf[0]), state[0], transition[0],
+                                 info['warnflag'] == 0)
+
+
+class NumpyARIMAResults:
+    """
+    Fitted NumpyEngine model; mirrors the parts of ARIMAResults the backend uses.
+    """
+
+    def __init__(self, series, arima_order, params, llf, state, transition, converged):
+        d = arima_order[1]
+        self.order = tuple(arima_order)
+        self.params = params
+        self.sigma2 = float(params[-1])
+        self.nobs = len(series)
+        self.llf = llf
+        k = len(params)
+        self.aic = -2 * llf + 2 * k
+        self.bic = -2 * llf + k * math.log(max(self.nobs - d, 1))
+        self.mle_retvals = {"converged": bool(converged and math.isfinite(llf))}
+        self._series = series
+        self._state = state
+        self._transition = transition
+
+    def forecast(self, steps=1):
+        d = self.order[1]
+        state = self._state
+        predicted = []
+        for _ in range(steps):
+            # The series is the sum of its d integrated states and the first ARMA state
+            predicted.append(state[:d + 1].sum())
+            state = self._transition @ state
+        index = _forecast_index(self._series.index, steps)
+        return pd.Series(predicted, index=index, name='predicted_mean')
+
+
+# Forward-difference step of the gradient (scipy's relative step where it vanishes next to x),
+# and the initial variance of the integrated states; statsmodels' values
+_GRADIENT_STEP = 1e-5
+_MIN_STEP = np.sqrt(np.finfo(float).eps)
+_DIFFUSE_VARIANCE = 1e6
+
+
+def _loglike(values, params, p, d, q):
+    # Exact Gaussian log-likelihood of each row of params = [phi, theta, sigma2], filtered as one batch.
+    # Returns it with the predicted state after the last observation and the transition matrix.
+    batch = len(params)
+    phi, theta, sigma2 = params[:, :p], params[:, p:p + q], params[:, -1]
+    r = max(p, q + 1)
+    k = d + r
+
+    # State: the d integrated states (y, its differences), then the ARMA states in Harvey's form
+    transition = np.zeros((batch, k, k))
+    transition[:, :d, :d] = np.triu(np.ones((d, d)))
+    transition[:, :d, d] = 1.0
+    transition[:, d:d + p, d] = phi
+    transition[:, d:d + r - 1, d + 1:] = np.eye(r - 1)
+    selection = np.zeros((batch, k))
+    selection[:, d] = 1.0
+    selection[:, d + 1:d + 1 + q] = theta
+    design = np.zeros(k)
+    design[:d + 1] = 1.0
+    state_cov = selection[:, :, None] * selection[:, None, :] * sigma2[:, None, None]
+
+    # Stationary covariance of the ARMA states: P = T P T' + R R' sigma2, solved as a linear system
+    arma = transition[:, d:, d:]
+    lyapunov = np.eye(r * r) - np.einsum('bij,bkl->bikjl', arma, arma).reshape(batch, r * r, r * r)
+    cov = np.zeros((batch, k, k))
+    cov[:, :d, :d] = np.eye(d) * _DIFFUSE_VARIANCE
+    arma_cov, llf = _solve_rows(lyapunov, state_cov[:, d:, d:].reshape(batch, r * r))
+    cov[:, d:, d:] = arma_cov.reshape(batch, r, r)
+
+    state = np.zeros((batch, k))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for t, value in enumerate(values):
+            cov_design = cov @ design
+            variance = cov_design @ design
+            error = value - state @ design
+            if t >= d:
+                llf -= 0.5 * (math.log(2 * math.pi) + np.log(variance) + error * error / variance)
+            gain = np.einsum('bij,bj->bi', transition, cov_design) / variance[:, None]
+            state = np.einsum('bij,bj->bi', transition, state) + gain * error[:, None]
+            cov = (transition @ cov @ transition.transpose(0, 2, 1) + state_cov
+                   - variance[:, None, None] * gain[:, :, None] * gain[:, None, :])
+    return np.where(np.isnan(llf), -np.inf, llf), state, transition
+
+
+def _solve_rows(matrices, rhs):
+    # Batched solve; if a row is singular (an AR root numerically on the unit circle),
+    # solves row by row and gives the singular rows a -inf log-likelihood
+    try:
+        return np.linalg.solve(matrices, rhs[:, :, None])[:, :, 0], np.zeros(len(rhs))
+    except np.linalg.LinAlgError:
+        pass
+    solved, llf = np.zeros_like(rhs), np.zeros(len(rhs))
+    for b in range(len(rhs)):
+        try:
+            solved[b] = np.linalg.solve(matrices[b], rhs[b])
+        except np.linalg.LinAlgError:
+            llf[b] = -np.inf
+    return solved, llf
+
+
+def _start_params(diffed, p, q):
+    # statsmodels' conditional least squares: an AR(2q) for the innovations, then a
+    # regression on p lagged values and q lagged innovations; zeros where that fails
+    # or is not stationary / invertible, and the residual variance for sigma2
+    k = 2 * q
+    r = max(k + q, p)
+    try:
+        if len(diffed) <= max(r, k):
+            raise ValueError
+        innovations = None
+        if q:
+            lagged = _lags(diffed, k)[k:]
+            innovations = diffed[k:] - lagged @ (np.linalg.pinv(lagged) @ diffed[k:])
+        regressors = np.column_stack([_lags(diffed, p)[r:]] + ([_lags(innovations, q)[r - k:]] if q else []))
+        coef = np.linalg.pinv(regressors) @ diffed[r:]
+        residuals = diffed[r:] - regressors @ coef
+    except ValueError:
+        coef = np.zeros(p + q)
+        residuals = np.r_[np.zeros(2 * q), diffed - diffed.mean()]
+    phi, theta = coef[:p], coef[p:]
+    if not _stationary(phi):
+        phi = np.zeros(p)
+    if not _invertible(theta):
+        theta = np.zeros(q)
+    sigma2 = np.mean(residuals[q:] ** 2) if len(residuals) > max(1, q) else np.var(diffed)
+    return np.r_[phi, theta, max(sigma2, 1e-10)]
+
+
+def _lags(values, lags):
+    # Column j holds values lagged j + 1 times, zero before the sample starts
+    out = np.zeros((len(values), lags))
+    for lag in range(1, lags + 1):
+        out[lag:, lag - 1] = values[:-lag]
+    return out
+
+
+def _constrain(x, p, q):
+    # Unconstrained optimiser rows -> [stationary phi, invertible theta, sigma2]
+    return np.column_stack([_pacf_to_coef(x[:, :p]), -_pacf_to_coef(-x[:, p:p + q]), x[:, -1] ** 2])
+
+
+def _unconstrain(params, p, q):
+    return np.column_stack([_coef_to_pacf(params[:, :p]), -_coef_to_pacf(-params[:, p:p + q]),
+                            np.sqrt(params[:, -1])])
+
+
+def _pacf_to_coef(x):
+    # Monahan (1984): map each row to partial autocorrelations in (-1, 1), then
+    # Durbin-Levinson to the coefficients of a stationary AR polynomial
+    n = x.shape[1]
+    pacf = x / np.sqrt(1 + x ** 2)
+    y = np.zeros(x.shape + (n,))
+    for k in range(n):
+        for i in range(k):
+            y[:, k, i] = y[:, k - 1, i] + pacf[:, k] * y[:, k - 1, k - i - 1]
+        y[:, k, k] = pacf[:, k]
+    return -y[:, n - 1, :] if n else x
+
+
+def _coef_to_pacf(coef):
+    # Inverse of _pacf_to_coef
+    n = coef.shape[1]
+    if not n:
+        return coef
+    y = np.zeros(coef.shape + (n,))
+    y[:, n - 1, :] = -coef
+    for k in range(n - 1, 0, -1):
+        for i in range(k):
+            y[:, k - 1, i] = (y[:, k, i] - y[:, k, k] * y[:, k, k - i - 1]) / (1 - y[:, k, k] ** 2)
+    pacf = np.diagonal(y, axis1=1, axis2=2)
+    return pacf / np.sqrt(1 - pacf ** 2)
+
+
+def _invertible(theta):
+    # MA polynomial 1 + theta_1 z + ... + theta_q z^q must have all roots outside the unit circle
+    return _roots_outside_unit_circle(theta)
+
+
+def _stationary(phi):
+    # AR polynomial 1 - phi_1 z - ... - phi_p z^p must have all roots outside the unit circle
+    return _roots_outside_unit_circle(-np.asarray(phi))
+
+
+def _roots_outside_unit_circle(coef):
+    # Checked as statsmodels does: every inverse root of 1 + coef_1 z + ... inside the
+    # unit circle by a margin of 1e-10, so roots on the circle up to rounding fail
+    if len(coef) == 0:
+        return True
+    if not np.all(np.isfinite(coef)):
+        return False
+    inverse_roots = np.roots(np.r_[1.0, coef])
+    return bool(np.all(np.abs(inverse_roots) < 1 - 1e-10))
+
+
+def _forecast_index(index, steps):
+    # Continue a RangeIndex the way statsmodels does; anything else gets a plain positional index
+    if isinstance(index, pd.RangeIndex):
+        return pd.RangeIndex(index.stop, index.stop + steps * index.step, index.step)
+    return pd.RangeIndex(len(index), len(index) + steps)
+
+
+ENGINES = {engine.name: engine for engine in (StatsmodelsEngine(), NumpyEngine())}
+DEFAULT_ENGINE = 'statsmodels'
+
+
+def get_engine(name):
+    """
+    Returns the registered engine called name.
+
+    Raises:
+        KeyError: If no engine has that name.
+    """
+    if name not in ENGINES:
+        raise KeyError(f"Unknown forecasting engine '{name}'. Choose from {sorted(ENGINES)}.")
+    return ENGINES[name]
+
+
+def compare_engines(df, column_names=None, orders=tuple(sorted(NumpyEngine.ORDERS)), steps=10, engine='numpy',
+                    reference='statsmodels'):
+    """
+    Measures how far one engine's forecasts are from another's.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame.
+        column_names (list): Columns to compare; defaults to every column but the first (year) one.
+        orders (iterable): ARIMA orders to compare; defaults to those the NumPy engine supports.
+        steps (int): Forecast horizon.
+        engine, reference (str): Names of the engines to compare.
+
+    Returns:
+        pd.DataFrame: One row per (column, order) with the largest absolute
+        forecast difference relative to the series' last value; columns the
+        reference engine cannot fit are left out.
+    """
+    import warnings
+    if column_names is None:
+        column_names = df.columns.tolist()[1:]
+    rows = []
+    for column_name in column_names:
+        series = pd.to_numeric(df[column_name], errors='coerce').dropna()
+        if len(series) < 2 or series.iloc[-1] == 0:
+            continue
+        for order in orders:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    expected = get_engine(reference).fit(series, order).forecast(steps)
+                actual = get_engine(engine).fit(series, order).forecast(steps)
+            except Exception:
+                continue
+            diff = np.max(np.abs(actual.values - expected.values)) / abs(series.iloc[-1])
+            rows.append({"column": column_name, "order": order, "max_relative_diff": diff})
+    return pd.DataFrame(rows, columns=["column", "order", "max_relative_diff"])
+
+
+if __name__ == '__main__':
+    # Parity report against statsmodels on the real output table, for any orders:
+    #   python engines.py [p,d,q ...]
+    # The enforced bounds live in test_engines.py. Orders the engine rejects are left out of the report.
+    import dataframes
+    orders = [tuple(int(part) for part in arg.split(',')) for arg in sys.argv[1:]] or sorted(NumpyEngine.ORDERS)
+    report = compare_engines(dataframes.real_output_df, orders=orders)
+    summary = report.groupby("order")["max_relative_diff"].describe(percentiles=[0.5, 0.9])
+    summary = summary[["count", "50%", "90%", "max"]]
+    print(summary.to_string())
@@ -1,13 +1,62 @@
-from statsmodels.tsa.arima.model import ARIMA
-from flask import Flask, render_template, jsonify
 import pandas as pd
-import matplotlib.pyplot as plt
 import io
+import os
 import base64
+import hashlib
+import math
+import statistics
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import metrics
+from cache import LRUCache
+from engines import DEFAULT_ENGINE, get_engine
 
+# Fitted models and forecasts are cached per (dataset version, column, order[, steps], engine).
+# Set FORECAST_CACHE_DIR to also keep them on disk across restarts.
+CACHE_SIZE = int(os.environ.get('FORECAST_CACHE_SIZE', 256))
+CACHE_DIR = os.environ.get('FORECAST_CACHE_DIR')
 
+model_cache = LRUCache('models', max_entries=CACHE_SIZE, disk_dir=CACHE_DIR)
+result_cache = LRUCache('forecasts', max_entries=CACHE_SIZE, disk_dir=CACHE_DIR)
 
-def forecast(df, column_name, forecast_steps=5, arima_order=(1, 1, 1)):
+# Pass arima_order=AUTO_ORDER to pick (p,d,q) per column by searching ORDER_SEARCH.
+# The chosen order is cached per dataset version, so each search runs once.
+AUTO_ORDER = 'auto'
+ORDER_SEARCH = {
+    "p_values": (0, 1, 2, 3, 4, 5, 6),
+    "d_values": (0, 1, 2),
+    "q_values": (0, 1, 2),
+    "criterion": 'aic',
+}
+order_cache = LRUCache('orders', max_entries=CACHE_SIZE, disk_dir=CACHE_DIR)
+
+# Backtest forecasts are cached by source and a hash of the training window rather
+# than the dataset version, so appending a year only costs fits for the new origins.
+# Windows no longer in the data are pruned when a new version of the source is seen.
+backtest_cache = LRUCache('backtests', max_entries=CACHE_SIZE * 10, disk_dir=CACHE_DIR)
+
+# Rendered PNGs are cached in memory by a hash of the plotted data and PLOT_STYLE
+PLOT_CACHE_BYTES = int(os.environ.get('FORECAST_PLOT_CACHE_BYTES', 64 * 1024 * 1024))
+plot_cache = LRUCache('plots', max_entries=CACHE_SIZE * 10, max_bytes=PLOT_CACHE_BYTES)
+
+for cache in (model_cache, result_cache, order_cache, backtest_cache, plot_cache):
+    metrics.register_cache(cache)
+
+PLOT_STYLE = {
+    "figsize": (10, 5),
+    "axes_facecolor": '#f0f0f0',  # Light gray background for plot area
+    "figure_facecolor": '#1F1F1F',  # Slightly darker background for figure
+    "historical_color": 'blue',
+    "forecast_color": 'orange',
+    "text_color": '#D8B4FE',
+    "grid_color": '#cccccc',
+    "first_year": 2012,
+    "last_year": 2023,
+}
+
+
+def forecast(df, column_name, forecast_steps=5, arima_order=(1, 1, 1), include_plot=True,
+             engine=DEFAULT_ENGINE):
     """
     Forecasts future values of a specified time series column from a DataFrame using ARIMA.
     
@@ -16,60 +65,683 @@ def forecast(df, column_name, forecast_steps=5, arima_order=(1, 1, 1)):
         column_name (str): Name of the column to forecast.
         forecast_steps (int): How many steps ahead to forecast.
         arima_order (tuple): ARIMA(p,d,q) order.
+        include_plot (bool): Whether to render the base64 plot; if False only the
+            numeric historical and forecast series are returned.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
     
     Returns:
         JSON: Forecast data and base64 plot image.
     """
-    # 1. Ensure the column exists and is numeric
+    return forecast_horizons(df, column_name, forecast_steps, arima_order, include_plot, engine)[-1]
+
+
+def forecast_horizons(df, column_name, max_steps=10, arima_order=(1, 1, 1), include_plot=True,
+                      engine=DEFAULT_ENGINE):
+    """
+    Forecasts horizons 1..max_steps of a column from a single ARIMA fit.
+
+    The model is fitted once and forecast max_steps ahead; the payload for
+    horizon h is built from the first h forecast values, which is exactly what
+    a separate fit with forecast_steps=h would return.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame.
+        column_name (str): Name of the column to forecast.
+        max_steps (int): Largest horizon to forecast.
+        arima_order (tuple): ARIMA(p,d,q) order.
+        include_plot (bool): Whether to render a base64 plot for every horizon.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        list: One forecast payload (as returned by forecast) per horizon.
+    """
+    return list(iter_forecast_horizons(df, column_name, max_steps, arima_order, include_plot, engine))
+
+
+def iter_forecast_horizons(df, column_name, max_steps=10, arima_order=(1, 1, 1), include_plot=True,
+                           engine=DEFAULT_ENGINE):
+    """
+    Yields the payloads of forecast_horizons one horizon at a time.
+
+    The single fit happens before the first payload; each later payload only
+    costs its own plot render, so callers can stream horizon 1 while the rest
+    are still being built.
+    """
+    # 1. Ensure the column exists
     if column_name not in df.columns:
-        return {"error": f"Column '{column_name}' not found in DataFrame."}
+        error = {"error": f"Column '{column_name}' not found in DataFrame."}
+        for _ in range(max_steps):
+            yield error
+        return
+
+    series, forecast = forecast_series(df, column_name, max_steps, arima_order, engine)
+
+    build = build_payload if include_plot else build_data_payload
+    for steps in range(1, max_steps + 1):
+        yield build(series, forecast[:steps], column_name)
+
+
+def forecast_plot(df, column_name, forecast_steps=5, arima_order=(1, 1, 1), engine=DEFAULT_ENGINE):
+    """
+    Renders the forecast plot for one horizon as raw PNG bytes, reusing cached renders.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame.
+        column_name (str): Name of the column to forecast.
+        forecast_steps (int): How many steps ahead to forecast.
+        arima_order (tuple): ARIMA(p,d,q) order.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        tuple: (plot digest, PNG bytes); the digest is a strong ETag for the image.
+    """
+    digest, series, forecast = _plot_inputs(df, column_name, forecast_steps, arima_order, engine)
+    return digest, cached_render(series, forecast, column_name, digest)
+
+
+def forecast_plot_digest(df, column_name, forecast_steps=5, arima_order=(1, 1, 1), engine=DEFAULT_ENGINE):
+    """
+    Returns the digest forecast_plot would report, without rendering anything.
+    """
+    return _plot_inputs(df, column_name, forecast_steps, arima_order, engine)[0]
+
+
+def plot_digest(series, forecast, column_name):
+    """
+    Hashes everything a forecast plot depends on: the plotted data, the title and PLOT_STYLE.
+    """
+    digest = hashlib.sha256(repr((column_name, sorted(PLOT_STYLE.items()))).encode('utf-8'))
+    for values in (series, forecast):
+        digest.update(pd.util.hash_pandas_object(values, index=True).values.tobytes())
+    return digest.hexdigest()[:32]
+
+
+def cached_render(series, forecast, column_name, digest=None):
+    """
+    Returns render_plot's PNG bytes, rendering only on a plot cache miss.
+    """
+    digest = digest or plot_digest(series, forecast, column_name)
+    png = plot_cache.get((digest,))
+    if png is None:
+        with metrics.stage('render'):
+            png = render_plot(series, forecast, column_name)
+        plot_cache.put((digest,), png)
+    return png
+
+
+def _plot_inputs(df, column_name, forecast_steps, arima_order, engine):
+    if column_name not in df.columns:
+        raise KeyError(f"Column '{column_name}' not found in DataFrame.")
+    series, forecast = forecast_series(df, column_name, forecast_steps, arima_order, engine)
+    return plot_digest(series, forecast, column_name), series, forecast
+
+
+def forecast_series(df, column_name, forecast_steps, arima_order, engine=DEFAULT_ENGINE):
+    """
+    Returns the historical series of a column and its forecast, using the caches.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame containing column_name.
+        column_name (str): Name of the column to forecast.
+        forecast_steps (int): How many steps ahead to forecast.
+        arima_order (tuple): ARIMA(p,d,q) order, or AUTO_ORDER.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        tuple: (historical pd.Series, forecast pd.Series)
+    """
     series = pd.to_numeric(df[column_name], errors='coerce').dropna()
+    version = dataset_version(df)
+    arima_order = resolve_order(df, column_name, arima_order, engine=engine)
+
+    # Reuse a cached forecast, or fit (or reuse a cached fit) and forecast
+    result_key = (version, column_name, arima_order, forecast_steps, engine)
+    forecast = result_cache.get(result_key)
+    if forecast is None:
+        model_fit = fit_model(series, arima_order, (version, column_name, arima_order, engine), engine)
+        with metrics.stage('forecast'):
+            forecast = model_fit.forecast(steps=forecast_steps)
+        result_cache.put(result_key, forecast)
+    return series, forecast
+
+
+def forecast_batch(df, column_names=None, max_steps=10, arima_order=(1, 1, 1), max_workers=None,
+                   progress=None, engine=DEFAULT_ENGINE):
+    """
+    Forecasts many columns at once, fanning the ARIMA fits out over a process pool.
+
+    Columns already in the forecast cache are answered without fitting. A column
+    that is missing or fails to fit is reported under "errors" and does not
+    abort the rest of the batch.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame.
+        column_names (list): Columns to forecast; defaults to every column but the first (year) one.
+        max_steps (int): How many steps ahead to forecast; horizon h is the first h values.
+        arima_order (tuple): ARIMA(p,d,q) order, or AUTO_ORDER to search one per column.
+        max_workers (int): Size of the process pool; defaults to the number of CPUs.
+        progress (callable): Called as progress(column_name, error) as each column
+            finishes; error is None on success.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        dict: {"forecasts": {column: {"dates", "values"}}, "errors": {column: message}}
+    """
+    if column_names is None:
+        column_names = df.columns.tolist()[1:]
+    version = dataset_version(df)
+    forecasts = {}
+    errors = {}
+    pending = {}
+
+    for column_name in column_names:
+        if column_name not in df.columns:
+            errors[column_name] = f"Column '{column_name}' not found in DataFrame."
+            if progress:
+                progress(column_name, errors[column_name])
+            continue
+        column_order = arima_order
+        if arima_order == AUTO_ORDER:
+            found = order_cache.get(_order_key(version, column_name, engine))
+            column_order = found[0] if found else AUTO_ORDER
+        forecast = None
+        if column_order != AUTO_ORDER:
+            column_order = tuple(column_order)
+            forecast = result_cache.get((version, column_name, column_order, max_steps, engine))
+        if forecast is not None:
+            forecasts[column_name] = forecast
+            if progress:
+                progress(column_name, None)
+        else:
+            pending[column_name] = (pd.to_numeric(df[column_name], errors='coerce').dropna(), column_order)
+
+    if pending:
+        with metrics.stage('batch_fit'), ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_fit_and_forecast, series, column_order, max_steps, engine): column_name
+                for column_name, (series, column_order) in pending.items()
+            }
+            for future in as_completed(futures):
+                column_name = futures[future]
+                try:
+                    column_order, search, model_fit, forecast = future.result()
+                except Exception as e:
+                    errors[column_name] = f"{type(e).__name__}: {e}"
+                else:
+                    if search is not None:
+                        order_cache.put(_order_key(version, column_name, engine), (column_order, search))
+                    model_cache.put((version, column_name, column_order, engine), model_fit)
+                    result_cache.put((version, column_name, column_order, max_steps, engine), forecast)
+                    forecasts[column_name] = forecast
+                if progress:
+                    progress(column_name, errors.get(column_name))
+
+    return {
+        "forecasts": {
+            column_name: _series_json(forecasts[column_name])
+            for column_name in column_names if column_name in forecasts
+        },
+        "errors": errors
+    }
+
+
+def _fit_and_forecast(series, arima_order, max_steps, engine):
+    # Runs in a pool worker; the fitted model (and any order search) is sent back so the parent can cache it
+    search = None
+    if arima_order == AUTO_ORDER:
+        arima_order, search = select_order(series, max_workers=1, engine=engine, **ORDER_SEARCH)
+    model_fit = get_engine(engine).fit(series, arima_order)
+    return tuple(arima_order), search, model_fit, model_fit.forecast(steps=max_steps)
+
+
+def backtest(df, column_names=None, max_steps=3, arima_order=(1, 1, 1), min_train=6, max_workers=None,
+             engine=DEFAULT_ENGINE):
+    """
+    Scores forecasts with rolling-origin cross-validation.
+
+    For every origin k from min_train to len(series) - 1 the model is fitted on
+    the first k values and forecasts values k+1..k+max_steps, which are compared
+    with what actually happened. One fit per origin serves every horizon. The
+    fits of all columns are spread over a process pool, and each origin's
+    forecast is cached by the contents of its training window, so repeated
+    backtests (or backtests after a year is appended) only fit what is new.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame.
+        column_names (list): Columns to score; defaults to every column but the first (year) one.
+        max_steps (int): Longest horizon to score.
+        arima_order (tuple): ARIMA(p,d,q) order, or AUTO_ORDER to use the order
+            selected on each column's full series.
+        min_train (int): Number of values in the first training window.
+        max_workers (int): Size of the process pool; defaults to the number of CPUs.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        dict: {"columns": {column: {"horizons", "mape", "rmse", "origins", "failed_origins"}},
+        "summary": {"horizons", "mape"}, "errors": {column: message}}. MAPE is in
+        percent and the summary is its median over columns; a horizon no origin
+        could score is None.
+    """
+    if column_names is None:
+        column_names = df.columns.tolist()[1:]
+    source = _source_id(df)
+    dataset_version(df)
+    errors = {}
+    windows = {}
+    pending = {}
+
+    for column_name in column_names:
+        if column_name not in df.columns:
+            errors[column_name] = f"Column '{column_name}' not found in DataFrame."
+            continue
+        series = pd.to_numeric(df[column_name], errors='coerce').dropna()
+        if len(series) <= min_train:
+            errors[column_name] = f"Needs more than {min_train} values to backtest, has {len(series)}."
+            continue
+        try:
+            column_order = resolve_order(df, column_name, arima_order, max_workers, engine)
+        except ValueError as e:
+            errors[column_name] = str(e)
+            continue
+        windows[column_name] = (series, column_order, {})
+        for origin in range(min_train, len(series)):
+            key = _backtest_key(source, series.iloc[:origin], column_order, max_steps, engine)
+            forecast = backtest_cache.get(key)
+            if forecast is None:
+                pending.setdefault(column_name, []).append(origin)
+            else:
+                windows[column_name][2][origin] = forecast
+
+    if pending:
+        with metrics.stage('backtest_fit'), ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_backtest_fits, windows[column_name][0], windows[column_name][1], origins,
+                                max_steps, engine): column_name
+                for column_name, origins in pending.items()
+            }
+            for future in as_completed(futures):
+                column_name = futures[future]
+                series, column_order, forecasts = windows[column_name]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    errors[column_name] = f"{type(e).__name__}: {e}"
+                    del windows[column_name]
+                    continue
+                for origin, forecast in zip(pending[column_name], results):
+                    backtest_cache.put(_backtest_key(source, series.iloc[:origin], column_order, max_steps, engine),
+                                       forecast)
+                    forecasts[origin] = forecast
+
+    columns = {}
+    for column_name in column_names:
+        if column_name not in windows:
+            continue
+        series, column_order, forecasts = windows[column_name]
+        scores = _backtest_scores(series.to_numpy(dtype=float), forecasts, max_steps)
+        if not any(value is not None for value in scores["mape"] + scores["rmse"]):
+            errors[column_name] = "No origin could be fitted."
+            continue
+        columns[column_name] = dict(scores, order=column_order)
+
+    summary = []
+    for h in range(max_steps):
+        values = [scores["mape"][h] for scores in columns.values() if scores["mape"][h] is not None]
+        summary.append(statistics.median(values) if values else None)
+    return {
+        "columns": columns,
+        "summary": {"horizons": list(range(1, max_steps + 1)), "mape": summary},
+        "errors": errors
+    }
+
+
+def _backtest_fits(series, arima_order, origins, max_steps, engine):
+    # Runs in a pool worker; one forecast array per origin, or the error message if the fit failed
+    import warnings
+    results = []
+    for origin in origins:
+        try:
+            with warnings.catch_warnings():
+                # Short training windows make statsmodels warn on nearly every fit
+                warnings.simplefilter('ignore')
+                forecast = get_engine(engine).fit(series.iloc[:origin], arima_order).forecast(steps=max_steps)
+            results.append(forecast.to_numpy(dtype=float))
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+    return results
+
 
-    # 2. Fit ARIMA model
-    model = ARIMA(series, order=arima_order)
-    model_fit = model.fit()
+def _backtest_key(source, window, arima_order, max_steps, engine):
+    return (source, _window_digest(window), tuple(arima_order), max_steps, engine)
 
-    # 3. Forecast
-    forecast = model_fit.forecast(steps=forecast_steps)
 
-    # 4. Smooth connection (prevent gap in plot)
+def _window_digest(window):
+    return hashlib.sha256(window.to_numpy(dtype=float).tobytes()).hexdigest()[:16]
+
+
+def _prune_backtests(source, df):
+    # Keep the backtests of every training window the new data still contains
+    live = set()
+    for column_name in df.columns.tolist()[1:]:
+        series = pd.to_numeric(df[column_name], errors='coerce').dropna()
+        live.update(_window_digest(series.iloc[:origin]) for origin in range(1, len(series)))
+    return backtest_cache.prune(source, lambda key: key[0] in live)
+
+
+def _backtest_scores(values, forecasts, max_steps):
+    # MAPE (percent) and RMSE per horizon over every origin that has an actual value at that horizon
+    abs_pct = [[] for _ in range(max_steps)]
+    squared = [[] for _ in range(max_steps)]
+    failed = 0
+    for origin, forecast in sorted(forecasts.items()):
+        if isinstance(forecast, str):
+            failed += 1
+            continue
+        for h in range(min(max_steps, len(values) - origin)):
+            error = values[origin + h] - forecast[h]
+            if not math.isfinite(error):
+                continue
+            squared[h].append(error ** 2)
+            if values[origin + h] != 0:
+                abs_pct[h].append(abs(error / values[origin + h]) * 100)
+    return {
+        "horizons": list(range(1, max_steps + 1)),
+        "mape": [sum(e) / len(e) if e else None for e in abs_pct],
+        "rmse": [math.sqrt(sum(e) / len(e)) if e else None for e in squared],
+        "origins": len(forecasts),
+        "failed_origins": failed,
+    }
+
+
+def resolve_order(df, column_name, arima_order, max_workers=None, engine=DEFAULT_ENGINE):
+    """
+    Returns arima_order as a tuple, running (or reusing) the order search for AUTO_ORDER.
+
+    Args:
+        df (pd.DataFrame): Time-indexed DataFrame containing column_name.
+        column_name (str): Column whose order is needed.
+        arima_order (tuple or str): ARIMA(p,d,q) order, or AUTO_ORDER.
+        max_workers (int): Size of the process pool used by the search.
+        engine (str): Forecasting engine the search fits with.
+
+    Returns:
+        tuple: The ARIMA(p,d,q) order to fit.
+    """
+    if arima_order != AUTO_ORDER:
+        return tuple(arima_order)
+    return tuple(order_search(df, column_name, max_workers, engine)[0])
+
+
+def order_search(df, column_name, max_workers=None, engine=DEFAULT_ENGINE):
+    """
+    Returns the cached (order, search table) of a column, searching ORDER_SEARCH on a miss.
+    """
+    key = _order_key(dataset_version(df), column_name, engine)
+    found = order_cache.get(key)
+    if found is None:
+        series = pd.to_numeric(df[column_name], errors='coerce').dropna()
+        with metrics.stage('order_search'):
+            found = select_order(series, max_workers=max_workers, engine=engine, **ORDER_SEARCH)
+        order_cache.put(key, found)
+    return found
+
+
+def select_order(series, p_values=(0, 1, 2), d_values=(0, 1, 2), q_values=(0, 1, 2), criterion='aic',
+                 max_workers=None, engine=DEFAULT_ENGINE):
+    """
+    Picks the ARIMA(p,d,q) order with the lowest information criterion.
+
+    Candidates are fitted in waves of increasing p+q, each wave in parallel.
+    A candidate is pruned without fitting when it has more parameters than
+    the series can support, when the engine cannot fit it faithfully, or
+    when none of its simpler neighbours ((p-1,d,q) or (p,d,q-1)) is still
+    alive. Fitted candidates drop out when
+    the optimizer did not converge or when a simpler nested order scores at
+    least as well (dominated).
+
+    Args:
+        series (pd.Series): Values to fit.
+        p_values, d_values, q_values (iterable): Grid of orders to consider.
+        criterion (str): 'aic' or 'bic'.
+        max_workers (int): Size of the process pool; 1 fits in the calling process.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        tuple: (best order, {"p,d,q": score or the reason it was dropped})
+    """
+    grid = [(p, d, q) for p in p_values for d in d_values for q in q_values]
+    results = {}
+    alive = set()
+
+    for size in sorted({p + q for p, d, q in grid}):
+        wave = []
+        for p, d, q in (order for order in grid if order[0] + order[2] == size):
+            parents = [o for o in ((p - 1, d, q), (p, d, q - 1)) if o in results]
+            if p + q + 2 > len(series) - d - 1:
+                results[(p, d, q)] = 'too many parameters'
+            elif not get_engine(engine).supports((p, d, q)):
+                results[(p, d, q)] = 'not supported by engine'
+            elif parents and not any(o in alive for o in parents):
+                results[(p, d, q)] = 'pruned'
+            else:
+                wave.append((p, d, q))
+        if max_workers == 1:
+            scores = [_score_order(series, order, criterion, engine) for order in wave]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                scores = list(executor.map(_score_order, [series] * len(wave), wave,
+                                           [criterion] * len(wave), [engine] * len(wave)))
+        for order, score in zip(wave, scores):
+            results[order] = score
+            if isinstance(score, str):
+                continue
+            simpler = [o for o in alive if o[1] == order[1] and o[0] <= order[0] and o[2] <= order[2]]
+            if any(results[o] <= score for o in simpler):
+                results[order] = 'dominated'
+            else:
+                alive.add(order)
+
+    if not alive:
+        raise ValueError("No candidate ARIMA order could be fitted.")
+    best = min(alive, key=lambda o: (results[o], sum(o)))
+    return best, {','.join(map(str, order)): score for order, score in results.items()}
+
+
+def _score_order(series, arima_order, criterion, engine):
+    # Runs in a pool worker; returns the criterion, or why the candidate was dropped
+    try:
+        model_fit = get_engine(engine).fit(series, arima_order)
+    except Exception:
+        return 'failed'
+    if not model_fit.mle_retvals.get('converged', True):
+        return 'not converged'
+    score = float(getattr(model_fit, criterion))
+    return score if math.isfinite(score) else 'failed'
+
+
+def _order_key(version, column_name, engine):
+    return (version, column_name, repr(sorted(ORDER_SEARCH.items())), engine)
+
+
+def fit_model(series, arima_order, cache_key, engine=DEFAULT_ENGINE):
+    """
+    Fits an ARIMA model, reusing a cached fit for the same cache key.
+
+    Args:
+        series (pd.Series): Values to fit the model on.
+        arima_order (tuple): ARIMA(p,d,q) order.
+        cache_key (tuple): (dataset version, column, order, engine) identifying the fit.
+        engine (str): Forecasting engine to fit with (see engines.ENGINES).
+
+    Returns:
+        ARIMAResults: The fitted model (or the engine's equivalent).
+    """
+    model_fit = model_cache.get(cache_key)
+    if model_fit is None:
+        with metrics.stage('fit'):
+            model_fit = get_engine(engine).fit(series, arima_order)
+        model_cache.put(cache_key, model_fit)
+    return model_fit
+
+
+# Version and column hashes of the latest DataFrame seen of each source, kept so
+# the next version can take over the cached results of its unchanged columns
+_seen_versions = {}
+_version_lock = threading.Lock()
+
+
+def dataset_version(df):
+    """
+    Returns a short content hash of a DataFrame.
+
+    The hash changes whenever the source CSV's contents change, so cache
+    entries computed from the old data are no longer reachable. The first
+    time a new version is seen, whoever sees it (a request or the scheduler)
+    first copies the fits, forecasts and orders of every column whose values
+    did not change over to the new version, then drops the old version from
+    the caches, along with backtests of windows the new data no longer
+    contains. So a data change only costs refits of the changed columns.
+    """
+    version = content_version(df)
+    source = _source_id(df)
+    seen = _seen_versions.get(source)
+    if seen is None or seen[0] != version:
+        with _version_lock:
+            seen = _seen_versions.get(source)
+            if seen is None or seen[0] != version:
+                _install_version(source, version, df, seen)
+    return version
+
+
+def _install_version(source, version, df, seen):
+    # Caller holds _version_lock
+    hashes = column_hashes(df)
+    previous = model_cache.version(source)
+    if previous != version:
+        if seen is not None and seen[0] == previous:
+            unchanged = {column for column, digest in hashes.items() if seen[1].get(column) == digest}
+            keep = lambda key: key[0] in unchanged
+            for cache in (model_cache, result_cache, order_cache):
+                cache.copy_version(previous, version, keep)
+        _prune_backtests(source, df)
+        for cache in (model_cache, result_cache, order_cache):
+            cache.track_version(source, version)
+    _seen_versions[source] = (version, hashes)
+
+
+def column_hashes(df):
+    """
+    Returns a content hash of every column of a DataFrame, by column name.
+    """
+    return {column: pd.util.hash_pandas_object(df[column], index=True).values.tobytes() for column in df.columns}
+
+
+def content_version(df):
+    """
+    Returns the content hash dataset_version uses, without invalidating anything.
+    """
+    digest = hashlib.sha256(repr(df.columns.tolist()).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _source_id(df):
+    # The registry name of the table (see registry.Table), so a CSV edit that adds or renames
+    # an industry still replaces the old version; frames built elsewhere share one source
+    return df.attrs.get('source', 'default')
+
+
+def build_payload(series, forecast, column_name):
+    """
+    Builds the JSON payload (forecast values and base64 plot) for one horizon.
+
+    Args:
+        series (pd.Series): Historical values the model was fitted on.
+        forecast (pd.Series): Forecast values for this horizon.
+        column_name (str): Name of the forecast column, used in the plot title.
+
+    Returns:
+        dict: Forecast data and base64 plot image.
+    """
+    png = cached_render(series, forecast, column_name)
+    with metrics.stage('encode'):
+        encoded_plot = base64.b64encode(png).decode('utf-8')
+
+    return {
+        "forecast": _series_json(forecast),
+        "plot_base64": encoded_plot
+    }
+
+
+def build_data_payload(series, forecast, column_name):
+    """
+    Builds the data-only payload (historical and forecast values) for one horizon.
+
+    Args:
+        series (pd.Series): Historical values the model was fitted on.
+        forecast (pd.Series): Forecast values for this horizon.
+        column_name (str): Name of the forecast column.
+
+    Returns:
+        dict: Historical and forecast data, without a plot.
+    """
+    return {
+        "historical": _series_json(series),
+        "forecast": _series_json(forecast)
+    }
+
+
+def render_plot(series, forecast, column_name):
+    """
+    Plots the historical series and its forecast.
+
+    Draws on its own matplotlib Figure through the object API rather than
+    pyplot's global current figure, so renders on concurrent request threads
+    never draw into each other's plots.
+
+    Args:
+        series (pd.Series): Historical values the model was fitted on.
+        forecast (pd.Series): Forecast values to draw after the history.
+        column_name (str): Name of the forecast column, used in the title.
+
+    Returns:
+        bytes: The plot as a PNG image.
+    """
+    from matplotlib.figure import Figure
+
+    # Smooth connection (prevent gap in plot)
     full_forecast = pd.concat([series[-1:], forecast])
 
-    # 5. Plot historical + forecast with custom background and legible text
-    plt.figure(figsize=(10, 5))
-    ax = plt.gca()
-    ax.set_facecolor('#f0f0f0')  # Light gray background for plot area
-    plt.gcf().set_facecolor('#1F1F1F')  # Slightly darker background for figure
-
-    series.plot(label='Historical', color='blue')
-    full_forecast.plot(label='Forecast', style='--', color='orange')
-    plt.title(f"{column_name} Forecast", color='#D8B4FE')
-    plt.legend(facecolor='white', edgecolor='black')
-    plt.grid(True, color='#cccccc')
-    plt.xlabel("Time (Years)", color='#D8B4FE')
-    plt.ylabel("Millions of Dollars", color='#D8B4FE')
-    plt.xticks(
-        ticks=range((2023-2012)+len(full_forecast)),
-        labels=range(2012, 2023 + len(full_forecast)),
-        color='#D8B4FE'
+    # Plot historical + forecast with custom background and legible text
+    style = PLOT_STYLE
+    fig = Figure(figsize=style["figsize"])
+    ax = fig.add_subplot()
+    ax.set_facecolor(style["axes_facecolor"])
+    fig.set_facecolor(style["figure_facecolor"])
+
+    series.plot(ax=ax, label='Historical', color=style["historical_color"])
+    full_forecast.plot(ax=ax, label='Forecast', style='--', color=style["forecast_color"])
+    ax.set_title(f"{column_name} Forecast", color=style["text_color"])
+    ax.legend(facecolor='white', edgecolor='black')
+    ax.grid(True, color=style["grid_color"])
+    ax.set_xlabel("Time (Years)", color=style["text_color"])
+    ax.set_ylabel("Millions of Dollars", color=style["text_color"])
+    ax.set_xticks(
+        ticks=range((style["last_year"]-style["first_year"])+len(full_forecast)),
+        labels=range(style["first_year"], style["last_year"] + len(full_forecast)),
+        color=style["text_color"]
     )
-    plt.yticks(color='#D8B4FE')
-    
+    for label in ax.get_yticklabels():
+        label.set_color(style["text_color"])
 
-    # 6. Save plot as base64
+    # Save plot as PNG
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    encoded_plot = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close()
-
-    # 7. Return forecast as JSON
-    forecast_json = {
-        "dates": forecast.index.tolist(),
-        "values": forecast.tolist()
-    }
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
 
+
+def _series_json(series):
     return {
-        "forecast": forecast_json,
-        "plot_base64": encoded_plot
-    }
\ No newline at end of file
+        "dates": series.index.tolist(),
+        "values": series.tolist()
+    }
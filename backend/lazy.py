@@ -0,0 +1,20 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module that is only imported on first attribute access.
+
+    Lets the server answer /health before pandas, the datasets and the
+    forecasting stack have been loaded. importlib keeps concurrent first
+    accesses from importing the module twice.
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
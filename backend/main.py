@@ -1,39 +1,303 @@
-from statsmodels.tsa.arima.model import ARIMA
-from flask import Flask, jsonify, request
+from flask import Flask, Response, abort, g, json, jsonify, request, stream_with_context, url_for
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib import use
-use('Agg')  
-import io
-import base64
-import forcasts
-import dataframes
+import itertools
+import os
+import time
+import metrics
+from lazy import LazyModule
+from scheduler import ForecastScheduler
 #from waitress import serve
 
+# Heavy modules (pandas, the datasets, the forecasting stack) load on first use,
+# keeping them off the /health path; serve.py preloads them before forking workers
+forcasts = LazyModule('forcasts')
+registry = LazyModule('registry')
+engines = LazyModule('engines')
+series = LazyModule('series')
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # Every jsonify (and streamed json.dumps) counts as the 'serialize' stage
+    def dumps(self, obj, **kwargs):
+        with metrics.stage('serialize'):
+            return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 CORS(app)
 
+# Seconds browsers and proxies may reuse a plot before revalidating its ETag
+PLOT_MAX_AGE = 300
+
+# ARIMA order used unless a request passes ?order=p,d,q or ?order=auto
+DEFAULT_ORDER = (6,1,1)
+
+# Largest p, d and q a request may ask for; the tables hold about a dozen yearly values
+MAX_ORDER = (10,2,10)
+
+# Warms the forecast caches for every column; started when the server runs
+scheduler = ForecastScheduler('real_output_df', max_steps=10, arima_order=DEFAULT_ORDER)
+
+# Opt-in streaming formats for /forecast, chosen by ?stream= or the Accept header
+STREAM_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+@app.before_request
+def startTimer():
+    g.started = time.perf_counter()
+    metrics.start_request()
+
+@app.after_request
+def recordTimings(response):
+    # Streamed responses are measured up to their headers; their body is built later
+    elapsed = time.perf_counter() - g.started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.REQUESTS.inc((route, request.method, str(response.status_code)))
+    metrics.REQUEST_SECONDS.observe((route,), elapsed)
+    response.headers['Server-Timing'] = metrics.server_timing(metrics.request_timings(), elapsed)
+    response.headers['Timing-Allow-Origin'] = '*'
+    if 'table' in g:
+        # A response built from several tables carries the version of each
+        tables = [g.table, *g.get('joined_tables', ())]
+        response.headers['X-Dataset-Version'] = '+'.join(table.version for table in tables)
+    return response
+
+def realOutput():
+    # One table snapshot per request, so a reload mid-request cannot mix two versions
+    if 'table' not in g:
+        g.table = registry.registry.get('real_output_df')
+    return g.table.frame
+
+@app.route('/metrics')
+def metricsRoute():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def home():
     #return render_template('index.html')
     return jsonify({"message": "Welcome to the Flask app!"})
 
+@app.route('/health')
+def health():
+    return jsonify({"status": "ok"})
+
+@app.route('/ready')
+def ready():
+    # 503 until the warm-up has finished, so a load balancer can hold traffic
+    status = scheduler.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
 @app.route('/forecast')
 def forcastYears():
     column = request.args.get('column', default="Space economy", type=str)
-    plots = []
-    for i in range(1, 11):
-        plots.append(forcastRoute(column=column,length=i))
-    return jsonify(plots)
+    include_plot = request.args.get('format') != 'data'
+    order, engine = requestModel()
+    payloads = forcastPayloads(column, include_plot, order, engine)
+    try:
+        # The fit happens before the first payload, so its errors surface before a stream starts
+        payloads = itertools.chain([next(payloads)], payloads)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    stream = streamFormat()
+    if stream is None:
+        return jsonify(list(payloads))
+
+    def generate():
+        for steps, payload in enumerate(payloads, start=1):
+            payload = dict(payload, horizon=steps)
+            if stream == "sse":
+                yield f"id: {steps}\nevent: forecast\ndata: {json.dumps(payload)}\n\n"
+            else:
+                yield json.dumps(payload) + "\n"
+        if stream == "sse":
+            yield "event: end\ndata: {}\n\n"
+
+    response = Response(stream_with_context(generate()), mimetype=STREAM_MIMETYPES[stream])
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # keep reverse proxies from buffering the stream
+    return response
+
+def forcastPayloads(column, include_plot, order, engine):
+    payloads = forcastHorizonsRoute(column=column, max_length=10, include_plot=include_plot,
+                                    order=order, engine=engine)
+    # Plot links repeat the model choices of this request
+    model_args = {name: request.args[name] for name in ('order', 'engine') if name in request.args}
+    # Not a generator itself, so the table snapshot (and X-Dataset-Version) is taken before a stream starts
+    return (withPlotUrl(payload, column, steps, include_plot, model_args)
+            for steps, payload in enumerate(payloads, start=1))
+
+def withPlotUrl(payload, column, steps, include_plot, model_args):
+    if not include_plot and "error" not in payload:
+        # Numbers only; each horizon links to its lazily rendered plot
+        payload = dict(payload, plot_url=url_for('forcastPlot', column=column, steps=steps, **model_args))
+    return payload
+
+@app.errorhandler(400)
+def badRequest(e):
+    return jsonify({"error": e.description}), 400
+
+def requestOrder():
+    order = request.args.get('order')
+    if order is None:
+        return DEFAULT_ORDER
+    if order == forcasts.AUTO_ORDER:
+        return order
+    try:
+        order = tuple(int(part) for part in order.split(','))
+    except ValueError:
+        order = ()
+    if len(order) != 3:
+        abort(400, "order must be 'auto' or three integers 'p,d,q'.")
+    if not all(0 <= part <= limit for part, limit in zip(order, MAX_ORDER)):
+        abort(400, "order p,d,q must be non-negative with p <= {}, d <= {} and q <= {}.".format(*MAX_ORDER))
+    return order
+
+def requestEngine():
+    engine = request.args.get('engine', default=engines.DEFAULT_ENGINE)
+    if engine not in engines.ENGINES:
+        abort(400, f"engine must be one of {sorted(engines.ENGINES)}.")
+    return engine
+
+def requestModel():
+    # Order and engine of a forecast request; an engine only fits the orders it reproduces faithfully
+    order, engine = requestOrder(), requestEngine()
+    if order != forcasts.AUTO_ORDER and not engines.get_engine(engine).supports(order):
+        abort(400, f"engine '{engine}' cannot fit order {','.join(map(str, order))} faithfully; "
+                   f"pass another ?order= or engine={engines.DEFAULT_ENGINE}.")
+    return order, engine
+
+def streamFormat():
+    stream = request.args.get('stream')
+    if stream in STREAM_MIMETYPES:
+        return stream
+    accept = request.headers.get('Accept', '')
+    for name, mimetype in STREAM_MIMETYPES.items():
+        if mimetype in accept:
+            return name
+    return None
+
+@app.route('/forecast/plot')
+def forcastPlot():
+    column = request.args.get('column', default="Space economy", type=str)
+    steps = request.args.get('steps', default=1, type=int)
+    if not 1 <= steps <= 10:
+        return jsonify({"error": "steps must be between 1 and 10."}), 400
+    order, engine = requestModel()
+    try:
+        # Answer revalidations from the digest alone, before touching the render cache
+        etag = forcasts.forecast_plot_digest(realOutput(), column, steps, order, engine)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            etag, png = forcastPlotRoute(column=column, length=steps, order=order, engine=engine)
+            response = Response(png, mimetype='image/png')
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = PLOT_MAX_AGE
+    return response
+
+@app.route('/forecast/batch')
+def forcastBatch():
+    columns = request.args.getlist('column') or None
+    order, engine = requestModel()
+    return jsonify(forcasts.forecast_batch(realOutput(), columns, 10, order, engine=engine))
+
+@app.route('/forecast/order')
+def forcastOrder():
+    column = request.args.get('column', default="Space economy", type=str)
+    if column not in realOutput().columns:
+        return jsonify({"error": f"Column '{column}' not found in DataFrame."}), 404
+    try:
+        order, search = forcasts.order_search(realOutput(), column, engine=requestEngine())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    return jsonify({"order": order, "criterion": forcasts.ORDER_SEARCH["criterion"], "search": search})
+
+@app.route('/forecast/backtest')
+def forcastBacktest():
+    columns = request.args.getlist('column') or None
+    steps = request.args.get('steps', default=3, type=int)
+    min_train = request.args.get('min_train', default=6, type=int)
+    if not 1 <= steps <= 10:
+        return jsonify({"error": "steps must be between 1 and 10."}), 400
+    if min_train < 3:
+        return jsonify({"error": "min_train must be at least 3."}), 400
+    order, engine = requestModel()
+    return jsonify(forcasts.backtest(realOutput(), columns, steps, order, min_train, engine=engine))
+
+@app.route('/deflator')
+def deflator():
+    column = request.args.get('column', default="Space economy", type=str).strip()
+    g.table = registry.registry.get('deflator_df')
+    inflation = registry.registry.get('inflation_df')
+    g.joined_tables = [inflation]
+    try:
+        # deflator.py exports both tables from one matrix, so they share their columns
+        index = g.table.locate(column)
+    except KeyError:
+        return jsonify({"error": f"No deflator for '{column}'."}), 404
+    # NaN (no real value added, or the first year's inflation) is sent as null
+    return jsonify({
+        "column": column,
+        "years": g.table.years.tolist(),
+        "deflator": [value if value == value else None for value in g.table.values[:, index].tolist()],
+        "inflation": [value if value == value else None for value in inflation.values[:, index].tolist()],
+    })
+
+@app.route('/series')
+def seriesRoute():
+    name = request.args.get('table', default='real_output', type=str)
+    industries = request.args.getlist('industry') or None
+    start = request.args.get('start', type=int)
+    end = request.args.get('end', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    limit = request.args.get('limit', default=series.PAGE_SIZE, type=int)
+    fields = tuple(request.args.get('fields', default=','.join(series.DEFAULT_FIELDS), type=str).split(','))
+    unknown = [field for field in fields if field not in series.FIELDS]
+    if unknown:
+        return jsonify({"error": f"Unknown field(s) {unknown}. Choose from {list(series.FIELDS)}."}), 400
+    if start is not None and end is not None and start > end:
+        return jsonify({"error": "start must not be after end."}), 400
+    if offset < 0 or not 1 <= limit <= series.MAX_PAGE_SIZE:
+        return jsonify({"error": f"offset must be at least 0 and limit between 1 and {series.MAX_PAGE_SIZE}."}), 400
+    compress = request.accept_encodings['gzip'] > 0
+    try:
+        g.table = series.get_table(name)
+        etag = series.query_digest(name, g.table, industries, start, end, fields, offset, limit, compress)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            body = series.encoded_query(name, g.table, industries, start, end, fields, offset, limit, compress)
+            response = Response(body, mimetype='application/json')
+            if compress:
+                response.headers['Content-Encoding'] = 'gzip'
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    return response
 
 @app.route('/getColumns')
 def getColumns():
-    return jsonify(dataframes.real_output_df.columns.tolist()[1:])
+    return jsonify(realOutput().columns.tolist()[1:])
+
+def forcastHorizonsRoute(column, max_length, include_plot=True, order=DEFAULT_ORDER, engine=None):
+    return forcasts.iter_forecast_horizons(realOutput(), column, max_length, order, include_plot,
+                                           engine or engines.DEFAULT_ENGINE)
 
-def forcastRoute(column, length):
-    return forcasts.forecast(dataframes.real_output_df, column, length, (6,1,1))
+def forcastPlotRoute(column, length, order=DEFAULT_ORDER, engine=None):
+    return forcasts.forecast_plot(realOutput(), column, length, order, engine or engines.DEFAULT_ENGINE)
 
 if __name__ == '__main__':
     #serve(app, host='127.0.0.1', port=5000)
+    # Development server; see serve.py for the multi-worker production server
+    # With the debug reloader only the child process that serves requests should precompute
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        scheduler.start()
     app.run(debug=True, port=3500)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """
+    Monotonic counter with one value per combination of label values.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, (), value) for labels, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """
+    Latency histogram with cumulative buckets, one per combination of label values.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            counts, total, count = self._values.get(labels, ((0,) * len(self.buckets), 0.0, 0))
+            counts = tuple(n + (value <= bound) for n, bound in zip(counts, self.buckets))
+            self._values[labels] = (counts, total + value, count + 1)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        samples = []
+        for labels, (counts, total, count) in values:
+            for bound, n in zip(self.buckets, counts):
+                samples.append((f"{self.name}_bucket", labels, (('le', repr(bound)),), n))
+            samples.append((f"{self.name}_bucket", labels, (('le', '+Inf'),), count))
+            samples.append((f"{self.name}_sum", labels, (), total))
+            samples.append((f"{self.name}_count", labels, (), count))
+        return samples
+
+
+REQUESTS = Counter('forecast_http_requests_total', "HTTP requests served.", ('route', 'method', 'status'))
+REQUEST_SECONDS = Histogram('forecast_http_request_duration_seconds',
+                            "Time to build each response, until its headers are sent.", ('route',))
+STAGE_SECONDS = Histogram('forecast_stage_duration_seconds',
+                          "Time spent in each stage of building a forecast.", ('stage',))
+METRICS = [REQUESTS, REQUEST_SECONDS, STAGE_SECONDS]
+
+# Caches reported on /metrics; forcasts registers its caches when it is imported
+_caches = []
+
+# Stages timed during the current request, for its Server-Timing header
+_timings = contextvars.ContextVar('timings', default=None)
+
+
+def register_cache(cache):
+    _caches.append(cache)
+
+
+def start_request():
+    """
+    Starts collecting the stage timings of the request handled by this thread.
+    """
+    _timings.set([])
+
+
+def request_timings():
+    """
+    Returns the (stage, seconds) pairs timed since start_request().
+    """
+    return list(_timings.get() or [])
+
+
+@contextmanager
+def stage(name):
+    """
+    Times the enclosed block as stage name, both in the stage histogram and in
+    the current request's Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe((name,), elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing(timings, total=None):
+    """
+    Formats stage timings as a Server-Timing header value.
+
+    Repeated stages (one render per horizon, say) are summed into one entry
+    whose description gives the count.
+
+    Args:
+        timings (list): (stage, seconds) pairs, as returned by request_timings().
+        total (float): Whole-request seconds, reported as the 'total' entry.
+
+    Returns:
+        str: e.g. 'fit;dur=212.4, render;dur=80.1;desc="10x", total;dur=301.9'
+    """
+    summed = {}
+    for name, seconds in timings:
+        duration, count = summed.get(name, (0.0, 0))
+        summed[name] = (duration + seconds, count + 1)
+    if total is not None:
+        summed['total'] = (total, 1)
+    entries = []
+    for name, (duration, count) in summed.items():
+        entry = f"{name};dur={duration * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="{count}x"'
+        entries.append(entry)
+    return ', '.join(entries)
+
+
+def render():
+    """
+    Renders every metric in the Prometheus text exposition format.
+
+    Values are per process: under serve.py each worker reports its own.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, extra, value in metric.samples():
+            lines.append(_sample(name, tuple(zip(metric.labelnames, labels)) + extra, value))
+
+    cache_metrics = (
+        ('forecast_cache_hits_total', 'counter', "Cache lookups answered from memory or disk.",
+         lambda cache: cache.hits),
+        ('forecast_cache_misses_total', 'counter', "Cache lookups that had to compute the value.",
+         lambda cache: cache.misses),
+        ('forecast_cache_hit_ratio', 'gauge', "Share of cache lookups that were hits.",
+         lambda cache: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else math.nan),
+        ('forecast_cache_entries', 'gauge', "Entries held in memory.",
+         len),
+    )
+    for name, kind, help, value in cache_metrics:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache in _caches:
+            lines.append(_sample(name, (('cache', cache.name),), value(cache)))
+    return '\n'.join(lines) + '\n'
+
+
+def _sample(name, labels, value):
+    if labels:
+        escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in labels)
+        name += '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+    if isinstance(value, float):
+        value = 'NaN' if math.isnan(value) else repr(value)
+    return f"{name} {value}"
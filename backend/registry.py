@@ -0,0 +1,281 @@
+import bisect
+import hashlib
+import io
+import os
+import re
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# The industry tree (CDC/industry_tree.py) gives every table its industry keys.
+# The columnar dataset of every BEA table is built on first use (CDC/bea_dataset.py);
+# without it tables are parsed from the CSVs
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CDC'))
+from industry_tree import industry_keys as _industry_keys
+try:
+    import bea_dataset
+except ImportError:
+    bea_dataset = None
+
+# Source CSV of each table, keyed by the name the rest of the backend uses
+SOURCES = {
+    'employment_df': '../data/Employment_By_Industry.csv',
+    'compensation_df': '../data/Compensation_By_Industry.csv',
+    'real_output_df': '../data/Real_Gross_Output_By_Industry.csv',
+    'value_added_df': '../data/Real_Value_Added_By_Industry.csv',
+    # GDP deflator and implied inflation of every industry, exported by CDC/deflator.py
+    'deflator_df': '../data/GDP_Deflator_By_Industry.csv',
+    'inflation_df': '../data/Implied_Inflation_By_Industry.csv',
+}
+
+# Raw BEA tables the pipelines read, with one row per industry and one column per
+# year; they are transposed on load into the layout of the tables above
+BEA_SOURCES = {
+    'nominal_gross_output_df': '../CDC/Space Economy Gross Output by Industry.csv',
+    'nominal_value_added_df': '../CDC/Space Economy Value Added by Industry.csv',
+    'gross_output_price_index_df': '../CDC/Space Economy Gross Output Price Indexes by Industry.csv',
+    'value_added_price_index_df': '../CDC/Space Economy Value Added Price Indexes by Industry.csv',
+}
+if bea_dataset:
+    SOURCES.update(BEA_SOURCES)
+
+
+# Suffix read_csv gives the second, third, ... column with the same label
+_REPEAT = re.compile(r'\.\d+$')
+
+
+def industry_keys(labels):
+    """
+    Returns the label-based key of every industry column, the same keys as
+    CDC/industry_tree.industry_keys so a key means the same row everywhere.
+    The '.1' read_csv appends to repeated labels is dropped first.
+    """
+    raw, seen = [], set()
+    for label in labels:
+        base = _REPEAT.sub('', label)
+        raw.append(base if base in seen else label)
+        seen.add(raw[-1])
+    return _industry_keys(pd.DataFrame(index=raw))
+
+
+def bea_frame(path):
+    """
+    Returns a raw BEA table in the layout of the backend CSVs as read_csv returns
+    them: a year column, then one column per industry label, with repeated
+    labels suffixed '.1', '.2', ... the way read_csv renames them.
+    """
+    table = bea_dataset.load_bea_table(path, drop_empty=False)
+    seen, columns = {}, []
+    for label in table.index:
+        count = seen.get(label, 0)
+        seen[label] = count + 1
+        columns.append(f"{label}.{count}" if count else label)
+    frame = pd.DataFrame(table.to_numpy(dtype=np.float64).T, columns=columns)
+    frame.insert(0, 'Unnamed: 0', np.asarray([int(year) for year in table.columns], dtype=np.int64))
+    return frame
+
+
+class Table:
+    """
+    One parsed BEA table, immutable once built.
+
+    The CSVs hold one row per year and one column per industry. Their values
+    are kept as a read-only float64 matrix (years x industries, column-major so
+    each industry's series is contiguous) with dictionaries from industry and
+    year to position, so single values and whole series are O(1) lookups.
+    Industries can be looked up by raw label or by key (see industry_keys).
+    frame is the DataFrame as read_csv returns it, with placeholders such as
+    '…' already NaN, for code written against the old module globals. Raw
+    BEA tables (BEA_SOURCES) are transposed into the same layout. While
+    the columnar dataset holds the same version of the CSV, the table is
+    taken from it instead of being parsed.
+    """
+
+    def __init__(self, name, path, data, mtime):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.version = hashlib.sha256(data).hexdigest()[:16]
+        self.loaded_at = time.time()
+        if name in BEA_SOURCES:
+            frame = bea_frame(path)
+        else:
+            frame = bea_dataset.load_backend_table(path, digest=self.version) if bea_dataset else None
+        if frame is None:
+            frame = pd.read_csv(io.BytesIO(data))
+            frame = pd.concat([frame.iloc[:, :1], frame.iloc[:, 1:].apply(pd.to_numeric, errors='coerce')], axis=1)
+        self.frame = frame
+        # Lets the forecast caches tell tables apart by name rather than by their columns
+        self.frame.attrs['source'] = name
+
+        self.years = self.frame.iloc[:, 0].to_numpy()
+        self.industries = tuple(self.frame.columns[1:])
+        values = self.frame.iloc[:, 1:].to_numpy(dtype=np.float64)
+        self.values = np.asfortranarray(values)
+        self.values.flags.writeable = False
+        self.keys = tuple(industry_keys(self.industries))
+        self._industry_index = {industry: i for i, industry in enumerate(self.industries)}
+        self._key_index = {key: i for i, key in enumerate(self.keys)}
+        self._year_index = {year: i for i, year in enumerate(self.years.tolist())}
+
+    def locate(self, industry):
+        """
+        Returns the column of an industry, given its raw label or its key.
+
+        Raises:
+            KeyError: If the table has no such industry.
+        """
+        if industry in self._industry_index:
+            return self._industry_index[industry]
+        return self._key_index[industry.strip()]
+
+    def year_range(self, start=None, end=None):
+        """
+        Returns the slice of rows from year start to year end, both included
+        (default: the first and last year).
+        """
+        years = self.years.tolist()
+        first = 0 if start is None else bisect.bisect_left(years, start)
+        last = len(years) if end is None else bisect.bisect_right(years, end)
+        return slice(first, last)
+
+    def series(self, industry):
+        """
+        Returns an industry's values for every year as a read-only array.
+
+        Raises:
+            KeyError: If the table has no such industry.
+        """
+        return self.values[:, self._industry_index[industry]]
+
+    def value(self, industry, year):
+        """
+        Returns one industry's value in one year (NaN where BEA reports none).
+
+        Raises:
+            KeyError: If the table has no such industry or year.
+        """
+        return float(self.values[self._year_index[year], self._industry_index[industry]])
+
+    def year(self, year):
+        """
+        Returns every industry's value in one year as a read-only array.
+        """
+        return self.values[self._year_index[year]]
+
+    def __contains__(self, industry):
+        return industry in self._industry_index or industry.strip() in self._key_index
+
+
+class DataRegistry:
+    """
+    Holds the current Table of every source and swaps in new ones as the CSVs change.
+
+    get() never waits on a reload: readers take whatever Table is current,
+    and a request that holds on to its Table keeps a consistent snapshot even
+    if a newer version is installed meanwhile. At most every check_interval
+    seconds a get() checks the source's mtime and size; when they changed the
+    file is hashed, and only when its contents changed is it parsed and the
+    new Table installed with a single reference swap.
+    """
+
+    def __init__(self, sources=SOURCES, check_interval=2.0):
+        self.sources = dict(sources)
+        self.check_interval = check_interval
+        self._tables = {}
+        self._checked = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Returns the current Table called name, loading it on first use.
+
+        Raises:
+            KeyError: If name is not a registered source.
+        """
+        if name not in self.sources:
+            raise KeyError(f"Unknown table '{name}'. Choose from {sorted(self.sources)}.")
+        table = self._tables.get(name)
+        if table is None:
+            with self._lock:
+                if name not in self._tables:
+                    self._load(name)
+            table = self._tables[name]
+        elif time.monotonic() - self._checked.get(name, 0) >= self.check_interval:
+            # Whoever gets the lock checks; everyone else reads the current table
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._refresh(name, force=False)
+                except (OSError, ValueError):
+                    pass  # e.g. a half-written file; keep serving the current table and retry next check
+                finally:
+                    self._lock.release()
+            table = self._tables[name]
+        return table
+
+    def refresh(self, names=None, force=False):
+        """
+        Reloads the tables whose source changed. A table whose source cannot
+        be read or parsed keeps its current version until a later refresh.
+
+        Args:
+            names (list): Tables to check; defaults to every loaded table.
+            force (bool): Hash the files even if their mtime and size are unchanged.
+
+        Returns:
+            list: Names of the tables that got a new version.
+        """
+        with self._lock:
+            names = list(self._tables) if names is None else names
+            reloaded = []
+            for name in names:
+                try:
+                    if self._refresh(name, force):
+                        reloaded.append(name)
+                except (OSError, ValueError):
+                    pass  # e.g. a half-written file; keep serving the current table and retry next refresh
+            return reloaded
+
+    def versions(self):
+        """
+        Returns the content version of every loaded table.
+        """
+        return {name: table.version for name, table in self._tables.items()}
+
+    def _refresh(self, name, force):
+        # Caller holds the lock
+        self._checked[name] = time.monotonic()
+        table = self._tables.get(name)
+        if table is None:
+            self._load(name)
+            return True
+        stat = os.stat(self.sources[name])
+        if not force and (stat.st_mtime, stat.st_size) == self._stats[name]:
+            return False
+        with open(self.sources[name], 'rb') as f:
+            data = f.read()
+        changed = hashlib.sha256(data).hexdigest()[:16] != table.version
+        if changed:
+            self._install(Table(name, self.sources[name], data, stat.st_mtime))
+        self._stats[name] = (stat.st_mtime, stat.st_size)
+        return changed
+
+    def _load(self, name):
+        path = self.sources[name]
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self._stats[name] = (stat.st_mtime, stat.st_size)
+        self._checked[name] = time.monotonic()
+        self._install(Table(name, path, data, stat.st_mtime))
+
+    def _install(self, table):
+        # Replace the dict rather than mutating it, so readers never see a half-updated mapping
+        self._tables = dict(self._tables, **{table.name: table})
+
+
+# Shared by the whole backend
+registry = DataRegistry()
@@ -0,0 +1,99 @@
+import threading
+import time
+from lazy import LazyModule
+
+# Loaded when the scheduler first runs, so importing it stays cheap
+forcasts = LazyModule('forcasts')
+dataframes = LazyModule('dataframes')
+
+
+class ForecastScheduler:
+    """
+    Precomputes forecasts in the background so requests never pay a cold fit.
+
+    On start every column of the watched table is fitted through
+    forcasts.forecast_batch. Afterwards the source CSVs are polled every
+    interval seconds; when the table changes, only the columns whose values
+    changed are refitted. The cached results of unchanged columns are carried
+    over by forcasts.dataset_version as soon as anything, a request included,
+    first sees the new version.
+
+    warm() runs the initial precompute in the calling thread; serve.py uses it
+    to warm the caches once before forking workers, which then inherit them.
+    """
+
+    def __init__(self, table='real_output_df', max_steps=10, arima_order=(1, 1, 1), interval=30.0):
+        self.table = table
+        self.max_steps = max_steps
+        self.arima_order = arima_order
+        self.interval = interval
+        self.ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._df = None
+        self._lock = threading.Lock()
+        self._progress = {"state": "idle", "total": 0, "done": 0, "failed": {}, "started": None, "finished": None}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='forecast-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def warm(self):
+        """
+        Precomputes every column of the watched table in the calling thread and marks the scheduler ready.
+        """
+        df = getattr(dataframes, self.table)
+        self._precompute(df, df.columns.tolist()[1:])
+        self._df = df
+        self.ready.set()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        """
+        Returns readiness and warm-up progress, as served by /ready.
+        """
+        with self._lock:
+            progress = dict(self._progress, failed=dict(self._progress["failed"]))
+        progress["ready"] = self.ready.is_set()
+        return progress
+
+    def _run(self):
+        if not self.ready.is_set():
+            self.warm()
+        df = self._df
+        while not self._stop.wait(self.interval):
+            dataframes.reload_if_changed()
+            new_df = getattr(dataframes, self.table)
+            # Requests may have picked up the new version already, so compare tables, not reload results
+            if new_df is df:
+                continue
+            self._precompute(new_df, changed_columns(df, new_df))
+            df = new_df
+
+    def _precompute(self, df, column_names):
+        with self._lock:
+            self._progress.update(state="running", total=len(column_names), done=0, failed={},
+                                  started=time.time(), finished=None)
+        forcasts.forecast_batch(df, column_names, self.max_steps, self.arima_order, progress=self._record)
+        with self._lock:
+            self._progress.update(state="idle", finished=time.time())
+
+    def _record(self, column_name, error):
+        with self._lock:
+            self._progress["done"] += 1
+            if error is not None:
+                self._progress["failed"][column_name] = error
+
+
+def changed_columns(old_df, new_df):
+    """
+    Lists the columns of new_df (after the first, year, column) that are new or whose values differ from old_df.
+    """
+    old_hashes = forcasts.column_hashes(old_df)
+    new_hashes = forcasts.column_hashes(new_df)
+    return [c for c in new_df.columns.tolist()[1:] if old_hashes.get(c) != new_hashes[c]]
@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import os
+from flask import json
+import metrics
+from cache import LRUCache
+from registry import SOURCES, registry
+
+# Tables /series serves, by the name clients use: the registry names without '_df'
+TABLES = {name[:-len('_df')]: name for name in SOURCES}
+
+# Fields each returned series can carry: its key (see registry.industry_keys),
+# its raw BEA label and its values over the requested years
+FIELDS = ('industry', 'label', 'values')
+DEFAULT_FIELDS = ('industry', 'values')
+
+# Series per page unless a request passes ?limit=
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Encoded response bodies, keyed by (table version, query, encoding), so repeated
+# dashboard queries skip both the slicing and the compression
+CACHE_BYTES = int(os.environ.get('SERIES_CACHE_BYTES', 16 * 1024 * 1024))
+response_cache = LRUCache('series', max_entries=4096, max_bytes=CACHE_BYTES)
+metrics.register_cache(response_cache)
+
+
+def get_table(name):
+    """
+    Returns the current registry Table behind a /series table name.
+
+    Raises:
+        KeyError: If name is not one of TABLES.
+    """
+    if name not in TABLES:
+        raise KeyError(f"Unknown table '{name}'. Choose from {sorted(TABLES)}.")
+    return registry.get(TABLES[name])
+
+
+def query(table, industries=None, start=None, end=None, fields=DEFAULT_FIELDS, offset=0, limit=PAGE_SIZE):
+    """
+    Slices a Table into a /series payload.
+
+    Every lookup goes through the table's industry and year indexes, so the
+    cost depends on the size of the slice, not of the table.
+
+    Args:
+        table (Table): Snapshot to read, from get_table().
+        industries (list): Keys or raw labels; defaults to every industry, in table order.
+        start (int): First year to include; defaults to the first year.
+        end (int): Last year to include; defaults to the last year.
+        fields (tuple): Which of FIELDS each series carries.
+        offset (int): Index of the first matching series to return.
+        limit (int): Most series to return.
+
+    Returns:
+        dict: The years, the page of series (NaN as null) and the paging state.
+
+    Raises:
+        KeyError: If an industry is not in the table.
+    """
+    if industries is None:
+        columns = range(len(table.industries))
+    else:
+        missing = [industry for industry in industries if industry not in table]
+        if missing:
+            raise KeyError(f"No industry {missing} in this table.")
+        columns = [table.locate(industry) for industry in industries]
+    rows = table.year_range(start, end)
+    page = columns[offset:offset + limit]
+
+    series = []
+    for column in page:
+        item = {}
+        if 'industry' in fields:
+            item['industry'] = table.keys[column]
+        if 'label' in fields:
+            item['label'] = table.industries[column]
+        if 'values' in fields:
+            item['values'] = [value if value == value else None for value in table.values[rows, column].tolist()]
+        series.append(item)
+    return {
+        "years": table.years[rows].tolist(),
+        "total": len(columns),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if offset + limit < len(columns) else None,
+        "series": series,
+    }
+
+
+def query_digest(name, table, *params):
+    """
+    Returns the ETag of a query: a hash of the table version and every parameter.
+    """
+    return hashlib.sha256(repr((table.version, name) + params).encode('utf-8')).hexdigest()[:16]
+
+
+def encoded_query(name, table, industries=None, start=None, end=None, fields=DEFAULT_FIELDS, offset=0,
+                  limit=PAGE_SIZE, compress=False):
+    """
+    Returns query()'s payload as JSON bytes, gzip-compressed when compress is
+    set, from the cache when the same query already ran on this table version.
+    """
+    response_cache.track_version(name, table.version)
+    key = (table.version, name, industries and tuple(industries), start, end, tuple(fields), offset, limit,
+           compress)
+    body = response_cache.get(key)
+    if body is None:
+        payload = dict(table=name, **query(table, industries, start, end, fields, offset, limit))
+        body = json.dumps(payload).encode('utf-8')
+        if compress:
+            with metrics.stage('compress'):
+                # mtime=0 keeps the bytes identical across workers and restarts
+                body = gzip.compress(body, compresslevel=6, mtime=0)
+        response_cache.put(key, body)
+    return body
@@ -0,0 +1,92 @@
+"""
+Production server for the forecasting API.
+
+    python serve.py [--host 0.0.0.0] [--port 3500] [--workers 4] [--threads 4] [--no-warm]
+
+On Linux and macOS the app runs under gunicorn with preload_app: the master
+process imports the app, parses the datasets and warms the forecast caches
+once, then forks the workers, which share those pages copy-on-write instead
+of re-reading the CSVs and refitting every model. gunicorn does not run on
+Windows, where the app is served by waitress in a single multi-threaded
+process instead.
+"""
+import argparse
+import gc
+import os
+import sys
+
+
+def preload(warm=True):
+    """
+    Imports the app and loads everything the workers should share.
+
+    Args:
+        warm (bool): Whether to precompute the forecasts of every column now.
+            Without it each worker warms its own caches in the background.
+
+    Returns:
+        flask.Flask: The WSGI app.
+    """
+    import main
+    import forcasts  # noqa: F401 - the forecasting stack, pandas and numpy
+    import series  # noqa: F401 - /series and its response cache
+    from registry import SOURCES, registry
+    for name in SOURCES:
+        registry.get(name)
+    if warm:
+        main.scheduler.warm()
+    # Keep the preloaded objects out of the collector so its bookkeeping does not
+    # write to (and so un-share) their pages after the fork
+    gc.freeze()
+    return main.app
+
+
+def start_worker(server=None, worker=None):
+    # Threads do not survive fork(), so each worker starts its own reload watcher
+    import main
+    main.scheduler.start()
+
+
+def serve_gunicorn(app_loader, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class ForecastServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('post_fork', start_worker)
+            # Streams and cold fits can outlast the default 30 s
+            self.cfg.set('timeout', 120)
+
+        def load(self):
+            return app_loader()
+
+    ForecastServer().run()
+
+
+def serve_waitress(app, host, port, threads):
+    from waitress import serve
+    start_worker()
+    serve(app, host=host, port=port, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the forecasting API with multiple workers.")
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 3500)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--no-warm', dest='warm', action='store_false',
+                        help="Start serving before the forecasts are precomputed.")
+    args = parser.parse_args()
+
+    if sys.platform == 'win32':
+        serve_waitress(preload(args.warm), args.host, args.port, args.threads * args.workers)
+    else:
+        serve_gunicorn(lambda: preload(args.warm), args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+The LRU caches of fitted models and forecasts, and how a data change invalidates them.
+
+    cd backend && python -m pytest -q test_cache.py
+"""
+import pandas as pd
+
+import forcasts
+from cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache('test', max_entries=2)
+    cache.put(('v1', 'a'), 1)
+    cache.put(('v1', 'b'), 2)
+    assert cache.get(('v1', 'a')) == 1
+    cache.put(('v1', 'c'), 3)
+    assert cache.get(('v1', 'b')) is None
+    assert cache.get(('v1', 'a')) == 1 and cache.get(('v1', 'c')) == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_byte_budget_evicts_but_keeps_the_newest_entry():
+    cache = LRUCache('test', max_entries=10, max_bytes=10)
+    cache.put(('p1',), b'x' * 6)
+    cache.put(('p2',), b'x' * 6)
+    assert cache.get(('p1',)) is None
+    assert cache.size_bytes == 6
+    cache.put(('p3',), b'x' * 20)
+    assert len(cache) == 1 and cache.get(('p3',)) is not None
+
+
+def test_disk_store_warms_a_new_cache(tmp_path):
+    LRUCache('test', disk_dir=str(tmp_path)).put(('v1', 'a'), {'fit': 1})
+    restarted = LRUCache('test', disk_dir=str(tmp_path))
+    assert restarted.get(('v1', 'a')) == {'fit': 1}
+    assert restarted.get(('v1', 'b')) is None
+
+
+def test_track_version_drops_the_replaced_version(tmp_path):
+    cache = LRUCache('test', disk_dir=str(tmp_path))
+    cache.track_version('table', 'v1')
+    cache.put(('v1', 'a'), 1)
+    cache.put(('other', 'a'), 2)
+    cache.track_version('table', 'v2')
+    assert cache.get(('v1', 'a')) is None
+    assert cache.get(('other', 'a')) == 2
+    # The version survives a restart, so stale disk entries are still recognised
+    assert LRUCache('test', disk_dir=str(tmp_path)).version('table') == 'v2'
+
+
+def test_copy_version_carries_over_the_kept_entries(tmp_path):
+    cache = LRUCache('test', disk_dir=str(tmp_path))
+    cache.put(('v1', 'a'), 1)
+    cache.put(('v1', 'b'), 2)
+    cache.clear()  # Only on disk now
+    assert cache.copy_version('v1', 'v2', lambda key: key[0] == 'a') == 1
+    assert cache.get(('v2', 'a')) == 1
+    assert cache.get(('v2', 'b')) is None
+
+
+def test_prune_drops_entries_from_memory_and_disk(tmp_path):
+    cache = LRUCache('test', disk_dir=str(tmp_path))
+    cache.put(('source', 'old'), 1)
+    cache.put(('source', 'live'), 2)
+    assert cache.prune('source', lambda key: key[0] == 'live') == 1
+    assert LRUCache('test', disk_dir=str(tmp_path)).get(('source', 'old')) is None
+    assert cache.get(('source', 'live')) == 2
+
+
+def test_data_change_only_invalidates_changed_columns():
+    df = pd.DataFrame({'year': [2012, 2013, 2014], 'a': [1.0, 2.0, 3.0], 'b': [4.0, 5.0, 6.0]})
+    df.attrs['source'] = 'test_cache'
+    old = forcasts.dataset_version(df)
+    for column in ('a', 'b'):
+        forcasts.model_cache.put((old, column, (1, 1, 0), 'numpy'), f'fit of {column}')
+
+    changed = df.assign(b=[4.0, 5.0, 7.0])
+    changed.attrs['source'] = 'test_cache'
+    new = forcasts.dataset_version(changed)
+    assert new != old
+    assert forcasts.model_cache.get((new, 'a', (1, 1, 0), 'numpy')) == 'fit of a'
+    assert forcasts.model_cache.get((new, 'b', (1, 1, 0), 'numpy')) is None
+    assert forcasts.model_cache.get((old, 'a', (1, 1, 0), 'numpy')) is None
@@ -0,0 +1,42 @@
+"""
+The /deflator endpoint: industry lookups and the versions of both tables it joins.
+
+    cd backend && python -m pytest -q test_deflator.py
+"""
+import os
+import pytest
+
+import registry
+from main import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The registry reads ../data relative to the backend directory
+    monkeypatch.chdir(HERE)
+    return app.test_client()
+
+
+def test_deflator_and_inflation_come_from_the_same_industry(client):
+    response = client.get('/deflator', query_string={'column': 'Mining'})
+    assert response.status_code == 200
+    payload = response.get_json()
+    deflator = registry.registry.get('deflator_df')
+    inflation = registry.registry.get('inflation_df')
+    assert payload['deflator'][0] == deflator.value('Mining', payload['years'][0])
+    assert payload['inflation'][1] == inflation.value('Mining', payload['years'][1])
+    assert payload['inflation'][0] is None
+
+
+def test_version_covers_both_tables(client):
+    response = client.get('/deflator')
+    versions = [registry.registry.get(name).version for name in ('deflator_df', 'inflation_df')]
+    assert response.headers['X-Dataset-Version'] == '+'.join(versions)
+
+
+def test_unknown_industry_is_404(client):
+    response = client.get('/deflator', query_string={'column': 'No such industry'})
+    assert response.status_code == 404
+    assert 'error' in response.get_json()
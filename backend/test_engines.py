@@ -0,0 +1,85 @@
+"""
+Parity of the NumPy forecasting engine with statsmodels on the real output table.
+
+    cd backend && python -m pytest -q test_engines.py
+"""
+import os
+import warnings
+import pandas as pd
+import pytest
+
+import engines
+from engines import NumpyEngine, compare_engines, get_engine
+from main import DEFAULT_ORDER, app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Largest forecast difference, relative to the series' last value, allowed for the
+# median column and for the 90th-percentile column of every supported order
+MEDIAN_TOLERANCE = 0.01
+P90_TOLERANCE = 0.10
+
+
+@pytest.fixture(scope='module')
+def real_output():
+    frame = pd.read_csv(os.path.join(HERE, '..', 'data', 'Real_Gross_Output_By_Industry.csv'))
+    # Every fourth industry keeps the run of every supported order to a few minutes
+    return frame.iloc[:, [0, *range(1, frame.shape[1], 4)]]
+
+
+@pytest.mark.parametrize('order', sorted(NumpyEngine.ORDERS))
+def test_supported_orders_match_statsmodels(real_output, order):
+    report = compare_engines(real_output, orders=[order])
+    # Every column compare_engines can score is in the report unless statsmodels itself cannot fit it
+    for column in set(real_output.columns[1:]) - set(report["column"]):
+        series = pd.to_numeric(real_output[column], errors='coerce').dropna()
+        if len(series) >= 2 and series.iloc[-1] != 0:
+            with pytest.raises(Exception), warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                get_engine('statsmodels').fit(series, order)
+    diffs = report["max_relative_diff"]
+    assert diffs.median() <= MEDIAN_TOLERANCE
+    assert diffs.quantile(0.9) <= P90_TOLERANCE
+
+
+def test_default_order_is_fitted_faithfully_or_rejected(real_output):
+    engine = get_engine('numpy')
+    if engine.supports(DEFAULT_ORDER):
+        report = compare_engines(real_output, orders=[DEFAULT_ORDER])
+        assert report["max_relative_diff"].quantile(0.9) <= P90_TOLERANCE
+    else:
+        series = pd.to_numeric(real_output["Space economy"], errors='coerce').dropna()
+        with pytest.raises(ValueError):
+            engine.fit(series, DEFAULT_ORDER)
+
+
+def test_information_criteria_match_statsmodels(real_output):
+    series = pd.to_numeric(real_output["Space economy"], errors='coerce').dropna()
+    for order in ((1, 1, 0), (2, 1, 0)):
+        ours, theirs = get_engine('numpy').fit(series, order), get_engine('statsmodels').fit(series, order)
+        assert ours.llf == pytest.approx(theirs.llf, rel=1e-6)
+        assert ours.aic == pytest.approx(theirs.aic, rel=1e-6)
+        assert ours.bic == pytest.approx(theirs.bic, rel=1e-6)
+
+
+def test_api_rejects_orders_the_engine_cannot_fit(monkeypatch):
+    # The registry reads ../data relative to the backend directory
+    monkeypatch.chdir(HERE)
+    client = app.test_client()
+    # The default order, no differencing, and p + d + q above MAX_TERMS
+    for order in (None, '6,1,1', '1,0,1', '3,1,2', '1,2,3'):
+        query = {'engine': 'numpy', 'format': 'data', **({'order': order} if order else {})}
+        if order is None and get_engine('numpy').supports(DEFAULT_ORDER):
+            continue
+        response = client.get('/forecast', query_string=query)
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        response = client.get('/forecast', query_string={'engine': 'numpy', 'order': '1,1,1', 'format': 'data'})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 10
+
+
+def test_statsmodels_supports_every_order():
+    assert engines.ENGINES['statsmodels'].supports(DEFAULT_ORDER)
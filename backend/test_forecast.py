@@ -0,0 +1,118 @@
+"""
+The /forecast endpoints: streamed horizons, batches of columns, backtests and cached plots.
+
+    cd backend && python -m pytest -q test_forecast.py
+"""
+import json
+import os
+import pytest
+
+import forcasts
+from main import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# A quick, faithfully reproduced model keeps the fits cheap
+MODEL = {'order': '1,1,0', 'engine': 'numpy'}
+COLUMNS = ['Space economy', '    Private industries']
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The registry reads ../data relative to the backend directory
+    monkeypatch.chdir(HERE)
+    return app.test_client()
+
+
+def test_ndjson_stream_matches_the_json_list(client):
+    query = {'format': 'data', **MODEL}
+    expected = client.get('/forecast', query_string=query).get_json()
+    response = client.get('/forecast', query_string=dict(query, stream='ndjson'))
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.headers['X-Dataset-Version']
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert lines == [dict(payload, horizon=h) for h, payload in enumerate(expected, start=1)]
+
+
+def test_sse_stream_is_chosen_by_accept_header(client):
+    response = client.get('/forecast', query_string={'format': 'data', **MODEL},
+                          headers={'Accept': 'text/event-stream'})
+    assert response.mimetype == 'text/event-stream'
+    events = response.data.decode().strip().split('\n\n')
+    assert len(events) == 11
+    assert events[0].startswith('id: 1\nevent: forecast\ndata: ')
+    assert json.loads(events[9].split('data: ', 1)[1])['horizon'] == 10
+    assert events[-1] == 'event: end\ndata: {}'
+
+
+def test_batch_forecasts_every_column_and_reports_missing_ones(client):
+    response = client.get('/forecast/batch', query_string={'column': [*COLUMNS, 'No such industry'], **MODEL})
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert sorted(payload['forecasts']) == sorted(COLUMNS)
+    assert all(len(forecast['values']) == 10 for forecast in payload['forecasts'].values())
+    assert list(payload['errors']) == ['No such industry']
+
+
+def test_batch_answers_from_the_forecast_cache(client):
+    query = {'column': COLUMNS, **MODEL}
+    first = client.get('/forecast/batch', query_string=query).get_json()
+    hits = forcasts.result_cache.hits
+    assert client.get('/forecast/batch', query_string=query).get_json() == first
+    assert forcasts.result_cache.hits == hits + len(COLUMNS)
+
+
+def test_backtest_scores_every_horizon(client):
+    query = {'column': [*COLUMNS, 'No such industry'], 'steps': 2, 'min_train': 6, **MODEL}
+    response = client.get('/forecast/backtest', query_string=query)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert sorted(payload['columns']) == sorted(COLUMNS)
+    scores = payload['columns']['Space economy']
+    # One origin per year after the first six
+    assert scores['horizons'] == [1, 2] and scores['origins'] == 6 and scores['failed_origins'] == 0
+    assert all(mape > 0 for mape in scores['mape']) and all(rmse > 0 for rmse in scores['rmse'])
+    assert payload['summary']['horizons'] == [1, 2]
+    assert list(payload['errors']) == ['No such industry']
+
+
+def test_backtest_reuses_cached_windows(client):
+    query = {'column': 'Space economy', 'steps': 3, **MODEL}
+    first = client.get('/forecast/backtest', query_string=query).get_json()
+    hits = forcasts.backtest_cache.hits
+    assert client.get('/forecast/backtest', query_string=query).get_json() == first
+    assert forcasts.backtest_cache.hits > hits
+
+
+@pytest.mark.parametrize('query', [{'steps': 0}, {'steps': 11}, {'min_train': 2}])
+def test_invalid_backtests_are_rejected(client, query):
+    response = client.get('/forecast/backtest', query_string={**MODEL, **query})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_plot_revalidates_with_304(client):
+    query = {'column': 'Space economy', 'steps': 3, **MODEL}
+    first = client.get('/forecast/plot', query_string=query)
+    assert first.status_code == 200
+    assert first.mimetype == 'image/png' and first.data.startswith(b'\x89PNG')
+    etag = first.headers['ETag']
+    assert first.cache_control.public and first.cache_control.max_age
+    again = client.get('/forecast/plot', query_string=query, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b'' and again.headers['ETag'] == etag
+    other = client.get('/forecast/plot', query_string=dict(query, steps=4), headers={'If-None-Match': etag})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('query, status', [
+    ({'steps': 11}, 400),
+    ({'column': 'No such industry'}, 404),
+])
+def test_invalid_plot_requests_are_rejected(client, query, status):
+    response = client.get('/forecast/plot', query_string={**MODEL, **query})
+    assert response.status_code == status
+    assert 'error' in response.get_json()
@@ -0,0 +1,70 @@
+"""
+Request metrics: the /metrics exposition and the Server-Timing header.
+
+    cd backend && python -m pytest -q test_metrics.py
+"""
+import os
+import re
+import pytest
+
+import metrics
+from main import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The registry reads ../data relative to the backend directory
+    monkeypatch.chdir(HERE)
+    return app.test_client()
+
+
+def sample(text, name, **labels):
+    """
+    Returns the value of one sample of the exposition text, or None.
+    """
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}\{{{re.escape(selector)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_requests_are_counted_and_timed(client):
+    before = client.get('/metrics').data.decode()
+    client.get('/health')
+    client.get('/no/such/route')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    after = response.data.decode()
+    requests = 'forecast_http_requests_total'
+    assert sample(after, requests, route='/health', method='GET', status='200') == \
+        (sample(before, requests, route='/health', method='GET', status='200') or 0) + 1
+    assert sample(after, requests, route='unmatched', method='GET', status='404') >= 1
+    count = sample(after, 'forecast_http_request_duration_seconds_count', route='/health')
+    assert sample(after, 'forecast_http_request_duration_seconds_bucket', route='/health', le='+Inf') == count
+
+
+def test_forecast_caches_are_reported(client):
+    client.get('/forecast', query_string={'order': '1,1,0', 'engine': 'numpy', 'format': 'data'})
+    text = client.get('/metrics').data.decode()
+    for cache in ('models', 'forecasts', 'plots'):
+        assert sample(text, 'forecast_cache_entries', cache=cache) is not None
+    assert sample(text, 'forecast_cache_misses_total', cache='forecasts') >= 1
+
+
+def test_server_timing_header_reports_the_stages(client):
+    response = client.get('/forecast', query_string={'order': '1,1,0', 'engine': 'numpy', 'format': 'data'})
+    entries = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+    assert entries[-1] == 'total'
+    assert response.headers['Timing-Allow-Origin'] == '*'
+
+
+def test_server_timing_sums_repeated_stages():
+    timings = [('fit', 0.2), ('render', 0.05), ('render', 0.03)]
+    assert metrics.server_timing(timings, total=0.3) == \
+        'fit;dur=200.0, render;dur=80.0;desc="2x", total;dur=300.0'
+
+
+def test_label_values_are_escaped():
+    assert metrics._sample('m', (('route', 'a"b\\c\nd'),), 1) == 'm{route="a\\"b\\\\c\\nd"} 1'
@@ -0,0 +1,77 @@
+"""
+Hot reload of the data registry.
+
+    cd backend && python -m pytest -q test_registry.py
+"""
+import os
+import pytest
+
+from registry import DataRegistry
+
+CSV = ",Space economy,Government\n2012,1.5,2.0\n2013,2.5,3.0\n"
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'table.csv'
+    path.write_text(CSV)
+    return path
+
+
+def rewrite(path, text):
+    path.write_text(text)
+    # Make the change visible to the mtime and size check even within one clock tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_refresh_installs_changed_contents_only(source):
+    registry = DataRegistry({'table': str(source)})
+    table = registry.get('table')
+    assert table.value('Space economy', 2013) == 2.5
+
+    # Same contents under a new mtime: hashed, but no new version
+    rewrite(source, CSV)
+    assert registry.refresh() == []
+    assert registry.get('table') is table
+
+    rewrite(source, CSV.replace('2.5', '4.5'))
+    assert registry.refresh() == ['table']
+    new_table = registry.get('table')
+    assert new_table.version != table.version
+    assert new_table.value('Space economy', 2013) == 4.5
+    # A reader holding the old table keeps its snapshot
+    assert table.value('Space economy', 2013) == 2.5
+
+
+def test_get_picks_up_changes_after_check_interval(source):
+    registry = DataRegistry({'table': str(source)}, check_interval=0)
+    table = registry.get('table')
+    rewrite(source, CSV.replace('1.5', '9.5'))
+    assert registry.get('table') is not table
+    assert registry.get('table').value('Space economy', 2012) == 9.5
+
+
+@pytest.mark.parametrize('broken', ['', None])
+def test_refresh_keeps_serving_when_a_source_is_unreadable(source, broken):
+    registry = DataRegistry({'table': str(source)})
+    table = registry.get('table')
+    if broken is None:
+        source.unlink()
+    else:
+        rewrite(source, broken)
+    assert registry.refresh() == []
+    assert registry.get('table') is table
+
+    # Once the file is whole again the next refresh installs it
+    rewrite(source, CSV.replace('3.0', '7.0'))
+    assert registry.refresh() == ['table']
+    assert registry.get('table').value('Government', 2013) == 7.0
+
+
+def test_tables_resolve_keys_and_labels(source):
+    rewrite(source, ",Space economy1,Government\n2012,1.5,2.0\n")
+    table = DataRegistry({'table': str(source)}).get('table')
+    assert table.keys == ('Space economy', 'Government')
+    assert table.locate('Space economy') == table.locate('Space economy1') == 0
+    assert 'Space economy' in table and 'Mining' not in table
@@ -0,0 +1,108 @@
+"""
+The /series query API: every table, paging, industry lookups and ETags.
+
+    cd backend && python -m pytest -q test_series.py
+"""
+import gzip
+import json
+import os
+import pytest
+
+import series
+from main import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The registry reads ../data and ../CDC relative to the backend directory
+    monkeypatch.chdir(HERE)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('table', sorted(series.TABLES))
+def test_every_table_is_served(client, table):
+    response = client.get('/series', query_string={'table': table, 'limit': 1})
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['table'] == table
+    assert payload['years'][0] == 2012 and len(payload['years']) == 12
+    assert len(payload['series'][0]['values']) == 12
+    assert response.headers['X-Dataset-Version'] == series.get_table(table).version
+
+
+@pytest.mark.parametrize('table', ['nominal_gross_output', 'nominal_value_added', 'gross_output_price_index',
+                                   'value_added_price_index'])
+def test_raw_bea_tables_are_served(client, table):
+    response = client.get('/series', query_string={'table': table, 'industry': ['Space economy1', 'Mining'],
+                                                   'fields': 'industry,label,values'})
+    assert response.status_code == 200
+    space, mining = response.get_json()['series']
+    assert space['industry'] == 'Space economy' and space['label'] == 'Space economy1'
+    assert all(value is not None for value in space['values'])
+    assert mining['label'].strip() == 'Mining'
+
+
+def test_price_index_is_100_in_the_reference_year(client):
+    payload = client.get('/series', query_string={'table': 'gross_output_price_index', 'start': 2017,
+                                                  'end': 2017}).get_json()
+    assert payload['years'] == [2017]
+    assert payload['series'][0]['values'] == [pytest.approx(100.0)]
+
+
+def test_repeated_labels_have_distinct_keys(client):
+    payload = client.get('/series', query_string={'table': 'nominal_value_added', 'fields': 'industry',
+                                                  'limit': series.MAX_PAGE_SIZE}).get_json()
+    keys = [item['industry'] for item in payload['series']]
+    assert len(keys) == len(set(keys))
+    assert {'Federal/General government', 'State and local/General government'} <= set(keys)
+
+
+def test_pages_cover_every_industry_once(client):
+    full = client.get('/series', query_string={'table': 'real_output', 'fields': 'industry',
+                                               'limit': series.MAX_PAGE_SIZE}).get_json()
+    keys, offset = [], 0
+    while offset is not None:
+        page = client.get('/series', query_string={'table': 'real_output', 'fields': 'industry', 'limit': 25,
+                                                   'offset': offset}).get_json()
+        assert page['total'] == full['total']
+        keys += [item['industry'] for item in page['series']]
+        offset = page['next_offset']
+    assert keys == [item['industry'] for item in full['series']]
+
+
+def test_etag_revalidates_with_304(client):
+    query = {'table': 'employment', 'start': 2015, 'end': 2020}
+    first = client.get('/series', query_string=query)
+    etag = first.headers['ETag']
+    assert etag
+    again = client.get('/series', query_string=query, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    other = client.get('/series', query_string=dict(query, end=2021), headers={'If-None-Match': etag})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != etag
+
+
+def test_gzip_is_used_when_accepted(client):
+    query = {'table': 'compensation'}
+    plain = client.get('/series', query_string=query)
+    compressed = client.get('/series', query_string=query, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+
+
+@pytest.mark.parametrize('query, status', [
+    ({'table': 'unknown'}, 404),
+    ({'industry': 'No such industry'}, 404),
+    ({'fields': 'industry,colour'}, 400),
+    ({'start': 2020, 'end': 2015}, 400),
+    ({'limit': 0}, 400),
+    ({'offset': -1}, 400),
+])
+def test_invalid_queries_are_rejected(client, query, status):
+    response = client.get('/series', query_string=query)
+    assert response.status_code == status
+    assert 'error' in response.get_json()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import "./App.css";
 import PredictInput from "./components/PredictInput.js";
 import Graphs from "./components/Graphs.js";
@@ -10,27 +10,53 @@ const App = () => {
   const [graphNumber, setGraphNumber] = useState(1);
   const [forecastData, setForecastData] = useState(null);
   const [columns, setColumns] = useState([]);
+  const forecastRequest = useRef(null);
   const [info, setInfo] = useState("The 'Space economy' column reports the real gross output for the overall space-related sector. This includes all industries and activities that contribute to space exploration, satellite services, and supporting technologies. Values are reported in millions of chained 2017 dollars.");
 
   const parseForecastImage = (data, altText = "Forecast Plot") => {
-    if (!data || !data.plot_base64) {
+    if (!data || !data.plot_url) {
       return <p>No image available.</p>;
     }
     return (
       <img
-        src={`data:image/png;base64,${data.plot_base64}`}
+        src={`http://localhost:${PORT}${data.plot_url}`}
         alt={altText}
         style={{ maxWidth: "100%", border: "1px solid #ccc", borderRadius: "8px" }}
       />
     );
   };
 
+  // Stream forecast horizons (one JSON object per line) so the first plot shows before all ten are ready
+  const streamForecast = (column) => {
+    const query = column === undefined ? "" : `&column=${encodeURIComponent(column)}`;
+    // Drop any stream still running for the previously selected column
+    if (forecastRequest.current) forecastRequest.current.abort();
+    const controller = new AbortController();
+    forecastRequest.current = controller;
+    setForecastData([]);
+    fetch(`http://localhost:${PORT}/forecast?format=data&stream=ndjson${query}`, { signal: controller.signal })
+      .then(async response => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = "";
+        for (;;) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffered += decoder.decode(value, { stream: true });
+          const lines = buffered.split("\n");
+          buffered = lines.pop();
+          const horizons = lines.filter(line => line.trim()).map(line => JSON.parse(line));
+          setForecastData(previous => [...previous, ...horizons]);
+        }
+      })
+      .catch(error => {
+        if (error.name !== "AbortError") console.error("Error fetching data:", error);
+      });
+  };
+
   useEffect(() => {
     // Fetch forecast data
-    fetch(`http://localhost:${PORT}/forecast`)
-      .then(response => response.json())
-      .then(data => setForecastData(data))
-      .catch(error => console.error("Error fetching data:", error));
+    streamForecast();
 
     // Fetch column names
     fetch(`http://localhost:${PORT}/getColumns`)
@@ -43,10 +69,7 @@ const App = () => {
     const selectedColumn = event.target.value;
     setInfo(information[selectedColumn.trim()] || "No information available for this selection.");
     // Fetch new forecast data based on selected column
-    fetch(`http://localhost:${PORT}/forecast?column=${encodeURIComponent(selectedColumn)}`)
-      .then(response => response.json())
-      .then(data => setForecastData(data))
-      .catch(error => console.error("Error fetching data:", error));
+    streamForecast(selectedColumn);
   }
   return (
     <>
@@ -59,8 +82,9 @@ const App = () => {
         <div className="left">
           <Graphs
             forecastImage={
-              Array.isArray(forecastData) && forecastData.length > graphNumber
-                ? parseForecastImage(forecastData[graphNumber])
+              // The slider counts horizons from 1; horizon h is the h-th streamed payload
+              Array.isArray(forecastData) && forecastData.length >= graphNumber
+                ? parseForecastImage(forecastData[graphNumber - 1])
                 : <p>Loading...</p>
             }
           />
@@ -12,11 +12,11 @@ const PredictInput = ({ setGraphNumber }) => {
 
     return (
         <div className="predict-input">
-            <label className="predict-btn">{parseInt(predictValue)+1}</label>
+            <label className="predict-btn">{parseInt(predictValue)}</label>
             <input
             type="range"
             min="1"
-            max="7"
+            max="10"
             step="1"
             value={predictValue}
             className="input-slider"